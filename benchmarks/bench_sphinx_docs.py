@@ -0,0 +1,60 @@
+"""Compare rendering the sphinx docs in process with running ``sphinx-quickstart``.
+
+Usage::
+
+    python benchmarks/bench_sphinx_docs.py [repeat]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rppc import create_sphinx_docs  # noqa: E402
+from rppc.tree import FileTree  # noqa: E402
+
+
+def sphinx_quickstart(docs_dir):
+    subprocess.run(['sphinx-quickstart', '--sep', '--project=MyPackage', '--author=First Last',
+                    '--ext-autodoc', '--ext-viewcode',
+                    '--extensions=sphinx.ext.napoleon', '--extensions=nbsphinx',
+                    '--makefile', '--dot=_', '--release=', '-v', '',
+                    '--suffix=.rst', '--language=en',
+                    '--master=index', '-q', '--no-batchfile', docs_dir],
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def render(docs_dir):
+    tree = FileTree()
+    create_sphinx_docs(tree, 'MyPackage', 'A package', 'First Last')
+    tree.flush(docs_dir)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        tmp = tempfile.mkdtemp(prefix='rppc-bench-')
+        try:
+            start = time.perf_counter()
+            func(os.path.join(tmp, 'docs'))
+            timings.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(tmp)
+    return min(timings)
+
+
+def main(repeat=5):
+    rendered = best_of(render, repeat)
+    print(f'in process:        {rendered * 1000:9.2f} ms')
+    if shutil.which('sphinx-quickstart') is None:
+        print('sphinx-quickstart: not installed')
+        return
+    quickstart = best_of(sphinx_quickstart, repeat)
+    print(f'sphinx-quickstart: {quickstart * 1000:9.2f} ms ({quickstart / rendered:.0f}x)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Local stand-ins for what the benchmarks must not depend on.
+
+``github`` serves the GitHub endpoints rppc uses, licenses, users and
+repositories, from ``127.0.0.1``, so that timings do not include the
+internet, nor eat into the rate limit. With ``--stub-commands``, external
+commands such as ``git`` are not run, they succeed at once, to measure
+rppc alone.
+"""
+import json
+import os
+import sys
+import zlib
+from urllib.parse import urlparse
+
+import pytest
+
+import rppc
+from rppc import executor, licenses, utils
+
+# The stub server of the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.conftest import serving  # noqa: E402
+
+GITHUB_USERNAME = 'jsuser'
+SPEC = f"""\
+name: MyAwesomePackage
+description: This is my test's package description
+author:
+  name: John Smith
+  email: jsmith@example.com
+dependencies:
+  - pandas
+  - numpy
+  - matplotlib
+github-id: {GITHUB_USERNAME}
+license: MIT
+"""
+
+
+@pytest.fixture
+def spec():
+    """str: A package specification, as read by ``rppc init -f``."""
+    return SPEC
+
+
+def pytest_addoption(parser):
+    parser.addoption('--stub-commands', action='store_true',
+                     help='Do not run external commands, such as git, they succeed at once')
+
+
+class StubExecutor(executor.Executor):
+    """Records commands as successful, without running them."""
+
+    def run(self, args, cwd=None, env=None, input=None, timeout=None, check=True, capture=True):
+        result = executor.CommandResult(args, cwd or os.getcwd(), 0, b'' if capture else None,
+                                        b'' if capture else None, 0.0)
+        with self._lock:
+            self.results.append(result)
+        return result
+
+
+@pytest.fixture
+def commands(request, monkeypatch):
+    """bool: Whether external commands really run, see ``--stub-commands``."""
+    if request.config.getoption('stub_commands'):
+        monkeypatch.setattr(executor, '_executor', StubExecutor())
+        return False
+    return True
+
+
+class GitHubStub:
+    """
+    Answers like the GitHub API, for one user without repositories.
+
+    Attributes:
+        url (str): The API root, once served.
+        hits (list): Method and path of every request.
+        clone_urls (list): Clone urls handed out, in order, by repository
+            creations, the name of the repository is used once it runs out.
+    """
+
+    def __init__(self):
+        self.url = None
+        self.hits = []
+        self.clone_urls = []
+        self.corpus = licenses.load_corpus(licenses.BUNDLED_CORPUS)
+
+    def respond(self, request, body):
+        """Answers a request, see :func:`tests.conftest.serving`."""
+        path = urlparse(request.path).path
+        self.hits.append((request.command, path))
+        status, data = self._answer(request.command, path.strip('/').split('/'), body)
+        body = json.dumps(data).encode()
+        return status, body, {'Content-Type': 'application/json', 'ETag': f'"{zlib.crc32(body):08x}"'}
+
+    def _answer(self, method, parts, body):
+        if method == 'GET':
+            if parts == ['licenses']:
+                return 200, [{'key': lic['key'], 'name': lic['name'], 'spdx_id': lic['spdx_id'],
+                              'url': f"{self.url}/licenses/{lic['key']}"}
+                             for lic in self.corpus['licenses']]
+            if len(parts) == 2 and parts[0] == 'licenses':
+                for lic in self.corpus['licenses']:
+                    if lic['key'] == parts[1]:
+                        return 200, {key: lic[key] for key in ('key', 'name', 'spdx_id', 'body')}
+            if parts == ['users', GITHUB_USERNAME]:
+                return 200, {'login': GITHUB_USERNAME, 'public_repos': 0}
+            if parts == ['users', GITHUB_USERNAME, 'repos']:
+                return 200, []
+        elif method == 'POST':
+            if parts == ['user', 'repos']:
+                name = json.loads(body or b'{}')['name']
+                clone_url = self.clone_urls.pop(0) if self.clone_urls else \
+                    f'https://github.com/{GITHUB_USERNAME}/{name}.git'
+                return 201, {'full_name': f'{GITHUB_USERNAME}/{name}', 'clone_url': clone_url}
+            if parts == ['graphql']:
+                return 200, {'data': {}}
+        return 404, {'message': 'Not Found'}
+
+
+@pytest.fixture(scope='session')
+def github_server():
+    stub = GitHubStub()
+    with serving(stub.respond) as url:
+        stub.url = url
+        yield stub
+
+
+@pytest.fixture
+def github(github_server, monkeypatch, tmp_path):
+    """GitHubStub: The GitHub API stand-in, used by rppc and doctr, for the test."""
+    import requests
+    from doctr import local
+
+    monkeypatch.setattr(utils, 'GITHUB_API_URL', github_server.url)
+    monkeypatch.setattr(utils, 'GITHUB_GRAPHQL_URL', f'{github_server.url}/graphql')
+    monkeypatch.setattr(local, 'GitHub_login', lambda *args, **kwargs: {
+        'auth': requests.auth.HTTPBasicAuth(GITHUB_USERNAME, 'token'), 'headers': {}})
+    monkeypatch.setattr(rppc, 'DEFAULT_CREDENTIAL_LOC', str(tmp_path / 'git-credentials'))
+    github_server.hits.clear()
+    github_server.clone_urls.clear()
+    yield github_server
+
+
+@pytest.fixture
+def git_identity(monkeypatch):
+    for role in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{role}_NAME', 'Bench Mark')
+        monkeypatch.setenv(f'GIT_{role}_EMAIL', 'bench@example.com')
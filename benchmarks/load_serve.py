@@ -0,0 +1,128 @@
+"""Load test ``rppc serve``: latency percentiles and throughput.
+
+Sends ``--requests`` package specifications from ``--concurrency`` clients,
+each keeping its connection open, and reports the p50, p90 and p99 latency,
+the requests per second and the requests refused with ``503``. A refused
+request is sent again after a jittered backoff starting at ``--retry-delay``
+and doubling up to the ``Retry-After`` of the server, its latency includes
+the retries. Without ``--url`` or ``--unix-socket`` a server is started in this
+process first.
+
+Usage::
+
+    python benchmarks/load_serve.py [--url http://127.0.0.1:8737] [--unix-socket PATH]
+                                    [--endpoint archive|packages] [--requests 500] [--concurrency 8]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rppc import server  # noqa: E402
+from rppc.batch import warm_caches  # noqa: E402
+
+
+def make_spec(i):
+    return {'name': f'load{i:06d}', 'description': 'Load test package',
+            'author': {'name': 'First Last', 'email': 'first@example.com'},
+            'dependencies': ['numpy'], 'license': 'MIT'}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def client(connect, path, jobs, latencies, statuses, lock, retry_delay):
+    connection = connect()
+    while True:
+        with lock:
+            if not jobs:
+                break
+            i = jobs.pop()
+        body = json.dumps(make_spec(i))
+        start = time.perf_counter()
+        delay = retry_delay
+        while True:
+            connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            with lock:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            if response.status != 503:
+                break
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, float(response.getheader('Retry-After', 1)))
+        if response.status < 300:
+            with lock:
+                latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Server to load, one is started in process otherwise')
+    parser.add_argument('--unix-socket', help='Unix socket of the server to load')
+    parser.add_argument('--endpoint', choices=('archive', 'packages'), default='archive')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--retry-delay', type=float, default=0.01, help='Seconds to wait after a first 503')
+    parser.add_argument('--workers', type=int, default=server.DEFAULT_WORKERS,
+                        help='Workers of the in-process server')
+    args = parser.parse_args()
+
+    local = None
+    base_dir = tempfile.mkdtemp(prefix='rppc-load-')
+    if args.unix_socket:
+        def connect():
+            return server.UnixHTTPConnection(args.unix_socket)
+    else:
+        if not args.url:
+            warm_caches()
+            local = server.make_server(port=0, workers=args.workers, base_dir=base_dir, quiet=True)
+            threading.Thread(target=local.serve_forever, daemon=True).start()
+            args.url = 'http://{}:{}'.format(*local.server_address[:2])
+        url = urlsplit(args.url)
+
+        def connect():
+            return http.client.HTTPConnection(url.hostname, url.port)
+
+    jobs = list(range(args.requests))
+    latencies = []
+    statuses = dict()
+    lock = threading.Lock()
+    threads = [threading.Thread(target=client, args=(connect, f'/{args.endpoint}', jobs, latencies, statuses, lock,
+                                                   args.retry_delay))
+               for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if local is not None:
+        local.shutdown()
+        local.server_close()
+        local.pool.shutdown()
+
+    print(f'{args.requests} requests to /{args.endpoint}, {args.concurrency} clients, {elapsed:.2f} s')
+    print(f"statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+    if latencies:
+        print(f'latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+              f'p90 {percentile(latencies, 0.9) * 1000:.1f} ms, '
+              f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms, '
+              f'mean {statistics.mean(latencies) * 1000:.1f} ms')
+    print(f'throughput: {len(latencies) / elapsed:.1f} requests/s')
+
+
+if __name__ == '__main__':
+    main()
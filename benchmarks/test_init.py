@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import itertools
+import os
+import subprocess
+
+import pytest
+
+from rppc import GIT_BACKENDS, init
+
+ROUNDS = 10
+
+
+def rounds_of(tmp_path):
+    """Yields a new directory to create the package in for each round."""
+    for i in range(ROUNDS + 1):
+        path = tmp_path / f'round{i}'
+        path.mkdir()
+        yield str(path)
+
+
+@pytest.mark.parametrize('git_backend', GIT_BACKENDS)
+def test_init(benchmark, tmp_path, spec, github, commands, git_identity, git_backend):
+    base_dirs = rounds_of(tmp_path)
+    benchmark.extra_info['commands'] = commands
+    benchmark.pedantic(init, setup=lambda: ((spec,), {'git_backend': git_backend, 'base_dir': next(base_dirs)}),
+                       rounds=ROUNDS, warmup_rounds=1)
+    assert os.path.exists(tmp_path / 'round0' / 'MyAwesomePackage' / 'setup.py')
+
+
+def test_init_github(benchmark, tmp_path, spec, github, commands, git_identity):
+    base_dirs = rounds_of(tmp_path)
+    remotes = itertools.count()
+
+    def setup():
+        # Each round pushes to its own repository
+        remote = str(tmp_path / f'remote{next(remotes)}.git')
+        subprocess.run(['git', 'init', '--quiet', '--bare', remote], check=True)
+        github.clone_urls.append(remote)
+        return (spec,), {'init_github': True, 'git_backend': 'native', 'base_dir': next(base_dirs)}
+
+    benchmark.extra_info['commands'] = commands
+    benchmark.pedantic(init, setup=setup, rounds=ROUNDS, warmup_rounds=1)
+    assert ('POST', '/user/repos') in github.hits
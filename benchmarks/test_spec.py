@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from rppc import get_user_input, render_pipeline
+from rppc.licenses import LicenseCatalog
+
+
+def test_get_user_input(benchmark, spec):
+    inputs = benchmark(get_user_input, spec)
+    assert inputs.license == 'MIT'
+
+
+def test_render_pipeline(benchmark, spec):
+    inputs = get_user_input(spec)
+    context = dict(inputs, github_username=inputs.gh_username, year=datetime.datetime.now().year)
+    outputs = benchmark(lambda: render_pipeline().run(context, workers=1))
+    assert 'setup.py' in outputs['package_tree']
+
+
+def test_refresh_licenses(benchmark, github, tmp_path):
+    catalog = LicenseCatalog(cache_dir=str(tmp_path))
+    # Revalidated with the ETag of the cached responses after the first round
+    benchmark.pedantic(catalog.refresh, args=(f'{github.url}/licenses',), rounds=10, warmup_rounds=1)
+    assert catalog['MIT']['body'] == LicenseCatalog()['MIT']['body']
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import inspect
+
+import pytest
+
+from rppc import templates
+from rppc.licenses import LicenseCatalog
+
+ARGUMENTS = {
+    'package_name': 'MyAwesomePackage',
+    'package_description': "This is my test's package description",
+    'author_name': 'John Smith',
+    'author_email': 'jsmith@example.com',
+    'github_username': 'jsuser',
+    'additional_text': 'pandas\nnumpy\nmatplotlib',
+    'license_detail': LicenseCatalog()['MIT'],
+    'year': 2020,
+}
+# Every template, so that a new one is measured too
+TEMPLATES = [func for name, func in inspect.getmembers(templates, inspect.isfunction)
+             if func.__module__ == templates.__name__]
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda func: func.__name__)
+def test_template(benchmark, template):
+    kwargs = {name: ARGUMENTS[name] for name in inspect.signature(template).parameters}
+    assert benchmark(template, **kwargs)
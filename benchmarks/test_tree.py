@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from rppc.tree import FileTree
+from rppc.utils import file_writer, folder_creator
+
+# About the size of a generated package
+FILES = 40
+CONTENT = 'x = 1\n' * 300
+ROUNDS = 50
+
+
+def write_files(folder):
+    for i in range(FILES):
+        file_writer(folder, f'module{i}.py', CONTENT)
+
+
+def test_file_writer_tree(benchmark):
+    benchmark.extra_info['bytes'] = FILES * len(CONTENT)
+    tree = FileTree()
+    benchmark(write_files, folder_creator(tree, 'package'))
+    assert len(tree) == FILES
+
+
+def test_file_writer_disk(benchmark, tmp_path):
+    benchmark.extra_info['bytes'] = FILES * len(CONTENT)
+    benchmark(write_files, str(tmp_path))
+    assert len(os.listdir(tmp_path)) == FILES
+
+
+@pytest.fixture
+def package_tree():
+    tree = FileTree()
+    for package in ('package', 'tests', 'docs'):
+        write_files(folder_creator(tree, package))
+    return tree
+
+
+def test_flush(benchmark, tmp_path, package_tree):
+    rounds = iter(range(ROUNDS))
+    benchmark.extra_info['bytes'] = package_tree.size
+    # Into a new directory each round, as for a new package
+    benchmark.pedantic(package_tree.flush, setup=lambda: ((str(tmp_path / str(next(rounds))),), {}),
+                       rounds=ROUNDS)
@@ -0,0 +1,200 @@
+"""Version lookup that avoids running git on every import.
+
+Resolution order:
+
+1. ``rppc/_frozen_version.py``, written at build/install time by
+   ``python setup.py freeze_version``.
+2. Outside a git checkout, ``_version.get_versions()`` which only reads
+   the versioneer keywords or the parent directory name.
+3. In a git checkout, a memoized ``_version.get_versions()`` cached on disk
+   and keyed on the modification times of ``HEAD``, the ref it points to and
+   the tags, and on the tracked files changed since they were staged, so the
+   git subprocesses only run again after a checkout, a commit, a new tag or
+   an edit.
+"""
+import json
+import os
+import struct
+import zlib
+
+FROZEN_VERSION_PY = """# This file was generated by 'setup.py freeze_version', do not edit.
+# Remove it to go back to computing the version from git.
+
+import json
+
+version_json = '''
+%s
+'''  # END VERSION_JSON
+
+versions = json.loads(version_json)
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git_dir(root):
+    git_path = os.path.join(root, '.git')
+    if os.path.isdir(git_path):
+        return git_path
+    if os.path.isfile(git_path):
+        # Worktrees and submodules point at the real git directory
+        with open(git_path) as f:
+            content = f.read().strip()
+        if content.startswith('gitdir:'):
+            return os.path.join(root, content[len('gitdir:'):].strip())
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def head_key(git_dir):
+    """
+    Builds the cache key of a git checkout.
+
+    Args:
+        git_dir (str): Full path to the ``.git`` directory.
+    Returns:
+        list: Modification times of ``HEAD``, the ref ``HEAD`` points to,
+        ``packed-refs``, the index and the directories of ``refs/tags``.
+    """
+    head = os.path.join(git_dir, 'HEAD')
+    key = [_mtime(head)]
+    try:
+        with open(head) as f:
+            ref = f.read().strip()
+    except OSError:
+        ref = ''
+    if ref.startswith('ref:'):
+        key.append(_mtime(os.path.join(git_dir, ref[len('ref:'):].strip())))
+    key.append(_mtime(os.path.join(git_dir, 'packed-refs')))
+    # The index changes when files get staged, which flips the dirty flag
+    key.append(_mtime(os.path.join(git_dir, 'index')))
+    # A new tag changes the version without touching any of the above
+    for path, _, _ in os.walk(os.path.join(git_dir, 'refs', 'tags')):
+        key.append(_mtime(path))
+    return key
+
+
+def worktree_key(git_dir, root):
+    """
+    Finds the tracked files edited since they were staged, as ``git status`` would.
+
+    Their stat data is compared with the one the index records, without
+    hashing them.
+
+    Args:
+        git_dir (str): Full path to the ``.git`` directory.
+        root (str): Full path to the working tree.
+    Returns:
+        list: ``[path, mtime]`` of each changed file, ``mtime`` is ``None``
+        for a deleted one. ``None`` if the index cannot be read.
+    """
+    try:
+        with open(os.path.join(git_dir, 'index'), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    except OSError:
+        return None
+    if data[:4] != b'DIRC':
+        return None
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3):
+        # Version 4 compresses the paths
+        return None
+    changed = []
+    offset = 12
+    try:
+        for _ in range(count):
+            _, _, mtime, mtime_ns, _, _, mode, _, _, size = struct.unpack_from('>10I', data, offset)
+            flags, = struct.unpack_from('>H', data, offset + 60)
+            start = offset + 62
+            if version == 3 and flags & 0x4000:
+                start += 2
+            end = data.index(b'\0', start)
+            # Entries are NUL padded to a multiple of 8 bytes, with at least one NUL
+            offset += (end - offset + 8) // 8 * 8
+            if mode >> 12 == 0o16:
+                # Submodule
+                continue
+            path = data[start:end].decode('utf-8', 'surrogateescape')
+            try:
+                st = os.lstat(os.path.join(root, path))
+            except OSError:
+                changed.append([path, None])
+                continue
+            if (int(st.st_mtime) & 0xffffffff, st.st_mtime_ns % 1000000000, st.st_size & 0xffffffff) != \
+                    (mtime, mtime_ns, size):
+                changed.append([path, st.st_mtime_ns])
+    except (struct.error, ValueError):
+        return None
+    return changed
+
+
+def write_frozen_version(filename, versions):
+    """
+    Freezes ``versions`` into a small importable module.
+
+    Args:
+        filename (str): Full path to the module to write.
+        versions (dict): Versions as returned by versioneer.
+    Returns:
+        None
+    """
+    contents = json.dumps(versions, sort_keys=True, indent=1, separators=(',', ': '))
+    with open(filename, 'w') as f:
+        f.write(FROZEN_VERSION_PY % contents)
+
+
+def get_versions(root=ROOT):
+    """
+    Retrieves the version information without running git when possible.
+
+    Args:
+        root (str): Full path to the source tree root.
+    Returns:
+        dict: Versions as returned by versioneer.
+    """
+    try:
+        from ._frozen_version import versions
+        return versions
+    except ImportError:
+        pass
+
+    from ._version import get_versions as _get_versions
+    from .utils import user_cache_dir
+
+    git_dir = _git_dir(root)
+    if git_dir is None:
+        return _get_versions()
+
+    changed = worktree_key(git_dir, root)
+    if changed is None:
+        return _get_versions()
+    key = head_key(git_dir) + [changed]
+    # zlib is already loaded by the interpreter, hashlib would pull in OpenSSL
+    root_hash = zlib.crc32(root.encode())
+    cache_file = os.path.join(user_cache_dir(), 'version', f'{root_hash:08x}.json')
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            return cached['versions']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    versions = _get_versions()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'key': key, 'versions': versions}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+    return versions
@@ -0,0 +1,151 @@
+"""Generate many packages from one spec file.
+
+The spec file is a yaml list of package specifications, in the same format
+as the file given to ``rppc init --file``, each with a ``license`` SPDX id::
+
+    - name: lab01
+      description: First lab
+      author:
+        name: First Last
+        email: myemail@example.com
+      dependencies:
+        - numpy
+      license: MIT
+    - name: lab02
+      ...
+
+A mapping with the list under ``packages`` is accepted too.
+"""
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+DEFAULT_PARALLEL = os.cpu_count() or 1
+
+
+def load_specs(spec_file):
+    """
+    Loads the package specifications of a batch.
+
+    Args:
+        spec_file (file): Open yaml spec file.
+    Returns:
+        list: The package specifications.
+    """
+    import yaml
+
+    specs = yaml.safe_load(spec_file)
+    if isinstance(specs, dict):
+        specs = specs.get('packages')
+    if not isinstance(specs, list):
+        raise ValueError('A batch spec file must hold a list of package specifications')
+    return specs
+
+
+def warm_caches():
+    """Loads the license corpus, gitignore templates, versioneer and HTTP session once per worker."""
+    from . import LICENSES, gitignore, http_client, versioning
+
+    LICENSES.licenses
+    gitignore.compose(gitignore.DEFAULT_TEMPLATES)
+    versioning.load_versioneer()
+    http_client.get_session()
+
+
+def spec_context(spec):
+    """
+    Turns a package specification into the initial values of a pipeline.
+
+    Args:
+        spec (dict): Package specification, with a ``license``.
+    Returns:
+        dict: The values, without prompting nor github access.
+    """
+    import datetime
+
+    from . import check_package_name, read_spec
+
+    inputs = read_spec(spec)
+    # Names become directories, and headers of the server
+    name = check_package_name(inputs['package_name'])
+    if inputs['license'] is None:
+        raise ValueError(f"{name} has no license, add e.g. 'license: MIT'")
+    return dict(inputs, github_username=inputs['gh_username'], gh_auth=None, git_url=None,
+                year=datetime.datetime.now().year)
+
+
+def generate_package(spec, workers=1, git_backend='cli', base_dir=None):
+    """
+    Creates one package of a batch, without prompting.
+
+    Args:
+        spec (dict): Package specification, with a ``license``.
+        workers (int): Maximum number of steps of this package running concurrently.
+        git_backend (str): How to create the repository, see :func:`rppc.init_pipeline`.
+        base_dir (str): Directory to create the package in, the current one by default.
+    Returns:
+        dict: Report entry with the ``name``, ``status`` (``ok`` or
+        ``failed``), ``path``, ``seconds`` and ``error`` of the package,
+        and the external ``commands`` it ran, see :meth:`rppc.executor.Executor.report`.
+    """
+    from . import create_package
+    from .executor import recording, summarize
+
+    start = time.perf_counter()
+    report = {'name': spec.get('name') if isinstance(spec, dict) else None,
+              'status': 'ok', 'path': None, 'error': None}
+    # Only the commands of this package, others may be created concurrently
+    with recording() as commands:
+        try:
+            report['path'] = create_package(spec_context(spec), workers=workers, git_backend=git_backend,
+                                            base_dir=base_dir)
+        except Exception as e:
+            report['status'] = 'failed'
+            report['error'] = ''.join(traceback.format_exception_only(type(e), e)).strip()
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    report['commands'] = summarize(commands)['programs']
+    return report
+
+
+def run_batch(specs, parallel=DEFAULT_PARALLEL, workers=1, report_file=None, git_backend='cli',
+              threads=False, base_dir=None):
+    """
+    Creates every package of a batch on a pool of processes, or of threads.
+
+    Each worker process warms the license corpus, gitignore templates,
+    versioneer and HTTP session once, then reuses them for every package
+    it creates. Threads share them, and skip starting the processes, which
+    pays off when most of the time is spent in git rather than in Python.
+    A failing package does not stop the others.
+
+    Args:
+        specs (list): Package specifications.
+        parallel (int): Maximum number of packages created at once.
+        workers (int): Maximum number of steps of a package running concurrently.
+        report_file (str): Where to write the json report, if anywhere.
+        git_backend (str): How to create the repositories, see :func:`rppc.init_pipeline`.
+        threads (bool): Create the packages on threads of this process.
+        base_dir (str): Directory to create the packages in, the current one by default.
+    Returns:
+        list: Report entries, see :func:`generate_package`, in ``specs`` order.
+    """
+    start = time.perf_counter()
+    base_dir = os.path.abspath(base_dir or os.curdir)
+    pool_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with pool_class(max_workers=parallel, initializer=warm_caches) as executor:
+        reports = list(executor.map(generate_package, specs, [workers] * len(specs),
+                                    [git_backend] * len(specs), [base_dir] * len(specs)))
+    elapsed = time.perf_counter() - start
+
+    if report_file:
+        summary = {
+            'packages': len(reports),
+            'failed': sum(r['status'] != 'ok' for r in reports),
+            'seconds': round(elapsed, 3),
+            'packages_per_minute': round(len(reports) / elapsed * 60, 1) if elapsed else None,
+        }
+        with open(report_file, 'w') as f:
+            json.dump({'summary': summary, 'packages': reports}, f, indent=2)
+    return reports
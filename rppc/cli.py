@@ -1,21 +1,235 @@
 import argparse
 
-from . import init
-
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description='Package Creator')
     subparsers = parser.add_subparsers(dest='cmd', help='Additional Commands')
 
     init_parser = subparsers.add_parser('init', help='Initialize a repository')
     init_parser.add_argument('-f','--file', type=argparse.FileType('r'), help='Info file')
     init_parser.add_argument('-gh', '--github', action='store_true', help='Upload to github')
+    init_parser.add_argument('-j', '--jobs', type=int, default=None,
+                             help='Number of steps to run concurrently')
+    init_parser.add_argument('-n', '--dry-run', action='store_true',
+                             help='Only show the files that would be created')
+    init_parser.add_argument('--git-backend', choices=('cli', 'fast-import', 'native'), default='cli',
+                             help='Create the repository with git init/add/commit, '
+                                  'with a single git fast-import, or without running git')
+    init_parser.add_argument('--bundle', help='Also export the repository to this git bundle')
+    init_parser.add_argument('-o', '--output',
+                             help='Write the package to this tar.gz, tar or zip archive instead, '
+                                  '- for the standard output')
+    init_parser.add_argument('--format', dest='archive_format', choices=('tar.gz', 'tar', 'zip'),
+                             help='Archive format, guessed from the --output extension by default')
+    init_parser.add_argument('--timings',
+                             help='Write the time and resources used by each external command '
+                                  'to this json file, batch reports always include them')
+    init_parser.add_argument('--profile', metavar='FILE',
+                             help='Write a timeline of the steps, commands and HTTP requests to this '
+                                  'Chrome trace file, to open in https://ui.perfetto.dev')
+    init_parser.add_argument('--profile-stats', metavar='DIR',
+                             help='Also write the cProfile statistics of each step to '
+                                  'DIR/{step}.pstats, running the steps one at a time')
+    init_parser.add_argument('-b', '--batch', type=argparse.FileType('r'),
+                             help='Spec file listing many packages to create')
+    init_parser.add_argument('-p', '--parallel', type=int, default=None,
+                             help='Number of packages of a batch to create concurrently')
+    init_parser.add_argument('--threads', action='store_true',
+                             help='Create the packages of a batch on threads instead of processes')
+    init_parser.add_argument('--report', default='rppc-batch-report.json',
+                             help='Where to write the batch report')
+
+    update_parser = subparsers.add_parser('update', help='Update a package to the current templates')
+    update_parser.add_argument('path', nargs='?', default=None,
+                               help='Package directory, defaults to the current one')
+    update_parser.add_argument('-f', '--file', type=argparse.FileType('r'),
+                               help='Info file with new package specifications')
+    update_parser.add_argument('-m', '--merge', action='store_true',
+                               help='Merge changes into the files edited since they were generated')
+    update_parser.add_argument('-n', '--dry-run', action='store_true',
+                               help='Only show the files that would be updated')
+
+    check_parser = subparsers.add_parser('check',
+                                         help='Check which repositories already exist on github')
+    check_parser.add_argument('repos', nargs='*', help='Repositories as owner/name')
+    check_parser.add_argument('-f', '--file', type=argparse.FileType('r'),
+                              help='File listing one owner/name per line')
+    check_parser.add_argument('--chunk-size', type=int, default=50,
+                              help='Repositories per GraphQL query')
+    check_parser.add_argument('--json', action='store_true', help='Print the result as json')
+
+    serve_parser = subparsers.add_parser('serve', help='Generate packages over HTTP from warm caches')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    serve_parser.add_argument('--port', type=int, default=8737, help='Port to listen on')
+    serve_parser.add_argument('--unix-socket', help='Listen on this unix socket instead')
+    serve_parser.add_argument('-w', '--workers', type=int, default=None,
+                              help='Number of requests generated at once')
+    serve_parser.add_argument('--queue-size', type=int, default=None,
+                              help='Number of requests waiting for a worker before new ones are refused')
+    serve_parser.add_argument('--git-backend', choices=('cli', 'fast-import', 'native'),
+                              default='native',
+                              help='How the repositories of created packages are written')
+    serve_parser.add_argument('-q', '--quiet', action='store_true', help='Do not log requests')
+
+    daemon_parser = subparsers.add_parser('daemon',
+                                          help='Manage the background process used with RPPC_DAEMON=1')
+    daemon_parser.add_argument('action', choices=('start', 'stop', 'status'))
+    daemon_parser.add_argument('--idle-timeout', type=float, default=None,
+                               help='Seconds without a command before a started daemon exits')
+
+    licenses_parser = subparsers.add_parser('licenses', help='Manage the offline license corpus')
+    licenses_subparsers = licenses_parser.add_subparsers(dest='licenses_cmd', help='License commands')
+    refresh_parser = licenses_subparsers.add_parser('refresh',
+                                                    help='Download the current GitHub license corpus')
+    refresh_parser.add_argument('-o', '--output',
+                                help='Corpus file to write, defaults to the user cache')
+    licenses_subparsers.add_parser('list', help='List the available licenses')
+
+    args = parser.parse_args(argv)
+    if args.cmd == 'init' and args.batch:
+        # Batches take everything from their spec file, and write their own report
+        options = {'--file': args.file, '--github': args.github, '--dry-run': args.dry_run,
+                   '--output': args.output, '--format': args.archive_format, '--bundle': args.bundle,
+                   '--timings': args.timings, '--profile': args.profile,
+                   '--profile-stats': args.profile_stats}
+        ignored = [option for option, value in options.items() if value]
+        if ignored:
+            init_parser.error(f"--batch cannot be combined with {', '.join(ignored)}")
+    return args
 
-    return parser.parse_args()
+def init_batch(args):
+    from .batch import DEFAULT_PARALLEL, load_specs, run_batch
+
+    reports = run_batch(load_specs(args.batch),
+                        parallel=args.parallel or DEFAULT_PARALLEL,
+                        workers=args.jobs or 1,
+                        git_backend=args.git_backend,
+                        threads=args.threads,
+                        report_file=args.report)
+    failed = [r for r in reports if r['status'] != 'ok']
+    for report in failed:
+        print(f"{report['name']}: {report['error']}")
+    print(f'{len(reports) - len(failed)} packages created, {len(failed)} failed, '
+          f'report written to {args.report}')
+    if failed:
+        exit(1)
+
+def daemon_command(args):
+    from . import daemon
+
+    try:
+        if args.action == 'start':
+            try:
+                status = daemon.request({'command': 'status'})
+            except daemon.DaemonError:
+                daemon.start(idle_timeout=args.idle_timeout or daemon.DEFAULT_IDLE_TIMEOUT).close()
+                status = daemon.request({'command': 'status'})
+            print(f"rppc daemon {status['pid']} listening on {daemon.socket_path()}")
+        elif args.action == 'stop':
+            print(f"rppc daemon {daemon.request({'command': 'stop'})['stopping']} stopped")
+        else:
+            status = daemon.request({'command': 'status'})
+            print(f"rppc daemon {status['pid']}: rppc {status['version']}, up {status['uptime']} s, "
+                  f"{status['served']} commands served, {status['running']} running")
+    except daemon.DaemonError as e:
+        exit(str(e))
 
 def main():
-    args = parse_args()
+    import os
+    import sys
+
+    argv = sys.argv[1:]
+    if os.environ.get('RPPC_DAEMON', '0') not in ('', '0') and argv[:1] != ['daemon']:
+        from . import daemon
+
+        try:
+            exit(daemon.call(argv))
+        except daemon.DaemonError as e:
+            print(f'rppc daemon unavailable, running here: {e}', file=sys.stderr)
+    run(argv)
+
+def run(argv=None):
+    args = parse_args(argv)
     if args.cmd == 'init':
-        init(info_file=args.file, init_github=args.github)
+        # Imported here so that ``rppc --help`` stays fast
+        if args.batch:
+            return init_batch(args)
+
+        import os
+
+        from . import init, profiling
+        from .staging import SignalCleanup
+
+        kwargs = {'workers': args.jobs} if args.jobs else {}
+        timings = os.path.abspath(args.timings) if args.timings else None
+        profile = os.path.abspath(args.profile) if args.profile else None
+        tracer = profiling.Tracer(args.profile_stats) if profile or args.profile_stats else None
+        try:
+            with profiling.tracing(tracer), profiling.span('rppc init', 'cli'):
+                init(info_file=args.file, init_github=args.github, dry_run=args.dry_run,
+                     git_backend=args.git_backend,
+                     bundle_file=os.path.abspath(args.bundle) if args.bundle else None,
+                     output=args.output, archive_format=args.archive_format, **kwargs)
+        except SignalCleanup as e:
+            exit(128 + e.signum)
+        finally:
+            if profile:
+                tracer.write(profile)
+            if timings:
+                import json
+
+                from .executor import get_executor
+
+                with open(timings, 'w') as f:
+                    json.dump(get_executor().report(), f, indent=2)
+    elif args.cmd == 'update':
+        import os
+
+        from . import update
+
+        package_dir = os.path.abspath(args.path) if args.path else None
+        statuses = update(package_dir, info_file=args.file, merge=args.merge, dry_run=args.dry_run)
+        if 'conflict' in statuses.values():
+            exit(1)
+    elif args.cmd == 'check':
+        import json
+
+        from .utils import check_packages
+
+        repos = list(args.repos)
+        if args.file:
+            repos.extend(line.strip() for line in args.file if line.strip())
+        try:
+            exists = check_packages(repos, chunk_size=args.chunk_size)
+        except Exception as e:
+            # Such as a missing or bad token, GitHub's answer is enough
+            message = str(e).strip() or type(e).__name__
+            exit(f'Cannot check the repositories: {message.splitlines()[0]}')
+        if args.json:
+            print(json.dumps(exists, indent=2))
+        else:
+            for repo, repo_exists in exists.items():
+                print(f"{repo}: {'exists' if repo_exists else 'available'}")
+    elif args.cmd == 'serve':
+        from .server import DEFAULT_QUEUE_SIZE, DEFAULT_WORKERS, serve
+
+        serve(host=args.host, port=args.port, unix_socket=args.unix_socket,
+              workers=args.workers or DEFAULT_WORKERS, queue_size=args.queue_size or DEFAULT_QUEUE_SIZE,
+              git_backend=args.git_backend, quiet=args.quiet)
+    elif args.cmd == 'daemon':
+        daemon_command(args)
+    elif args.cmd == 'licenses':
+        from . import LICENSES
+
+        if args.licenses_cmd == 'refresh':
+            from .licenses import load_corpus
+
+            output = LICENSES.refresh(output=args.output)
+            # The corpus in use may be another one, e.g. with --output
+            print(f"License corpus {load_corpus(output)['version']} written to {output}")
+        else:
+            print(f'License corpus {LICENSES.version}')
+            for lic in LICENSES:
+                print(f"{lic['spdx_id']}: {lic['name']}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
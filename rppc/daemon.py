@@ -0,0 +1,396 @@
+"""Run ``rppc`` commands in a warm background process.
+
+With ``RPPC_DAEMON=1`` in the environment, the ``rppc`` command forwards
+its arguments to a per-user daemon listening on a unix socket in the cache
+directory, starting it first if needed. The daemon has imported everything
+and warmed the license corpus, gitignore templates and versioneer once;
+for each command it forks a child that takes over the terminal of the
+client: its standard input, output and error are passed as file
+descriptors (``SCM_RIGHTS``), along with its arguments, directory,
+environment and umask. The client forwards ``Ctrl+C`` and ``SIGTERM`` to
+the child and exits with its status.
+
+The daemon exits once it has been idle for ``idle_timeout`` seconds, or
+when a client running other rppc code, or another interpreter, connects.
+Only processes of the same user can connect. If the daemon cannot be
+reached the command runs in the client as usual.
+"""
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+DEFAULT_IDLE_TIMEOUT = 600
+# Seconds to wait for a daemon that was just started
+START_TIMEOUT = 10
+LISTEN_BACKLOG = 64
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be reached or does not answer."""
+
+
+def socket_path():
+    """str: Path of the daemon socket, in the user cache directory."""
+    from .utils import user_cache_dir
+
+    return os.path.join(user_cache_dir(), 'daemon.sock')
+
+
+def _version():
+    from . import __version__
+
+    return __version__
+
+
+def code_id():
+    """str: Identifies the interpreter and rppc code, a daemon running other code is not used."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    mtime = max(entry.stat().st_mtime_ns for entry in os.scandir(package_dir)
+                if entry.name.endswith('.py'))
+    return f'{sys.executable}:{package_dir}:{mtime}'
+
+
+def _send(conn, message, fds=()):
+    data = (json.dumps(message) + '\n').encode('utf-8')
+    if fds:
+        socket.send_fds(conn, [data], list(fds))
+    else:
+        conn.sendall(data)
+
+
+class _Reader:
+    """Reads json lines from a connection, and the descriptors sent along."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.buffer = b''
+        self.fds = []
+
+    def read(self, max_fds=0):
+        while b'\n' not in self.buffer:
+            if max_fds and not self.fds:
+                data, fds, _, _ = socket.recv_fds(self.conn, 65536, max_fds)
+                self.fds.extend(fds)
+            else:
+                data = self.conn.recv(65536)
+            if not data:
+                return None
+            self.buffer += data
+            if len(self.buffer) > MAX_MESSAGE_SIZE:
+                raise DaemonError('Message too large')
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line)
+
+
+def _peer_is_us(conn):
+    if not hasattr(socket, 'SO_PEERCRED'):
+        # Only the user can reach the socket in its cache directory anyway
+        return True
+    import struct
+
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid == os.getuid()
+
+
+def _exit_status(argv):
+    """int: Runs a command as ``rppc`` would, and returns the status it would exit with."""
+    from .cli import run
+
+    try:
+        run(argv)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 128 + signal.SIGINT
+    return 0
+
+
+def _run_command(conn, request, fds):
+    """Runs a forwarded command in a forked child, never returns."""
+    code = 1
+    try:
+        conn.settimeout(None)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, 'r', closefd=False)
+        # Line buffered like the standard streams of the client would be
+        sys.stdout = open(1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, 'w', buffering=1, errors='backslashreplace', closefd=False)
+        os.chdir(request['cwd'])
+        os.umask(request['umask'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = ['rppc', *request['argv']]
+        _send(conn, {'pid': os.getpid()})
+        code = _exit_status(request['argv'])
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _send(conn, {'exit': code})
+        finally:
+            os._exit(0)
+
+
+def _reap(children):
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            children.discard(pid)
+
+
+def serve(path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Runs the daemon until it is idle for ``idle_timeout`` seconds.
+
+    Args:
+        path (str): Socket to listen on, see :func:`socket_path`.
+        idle_timeout (float): Seconds without a command running before exiting.
+    Returns:
+        None
+    """
+    from .batch import warm_caches
+
+    path = path or socket_path()
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        try:
+            _connect(path).close()
+        except OSError:
+            os.remove(path)
+        else:
+            raise DaemonError(f'A daemon already listens on {path}')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen(LISTEN_BACKLOG)
+    inode = os.stat(path).st_ino
+    code = code_id()
+    warm_caches()
+
+    children = set()
+    started = last_active = time.monotonic()
+    served = 0
+    try:
+        while True:
+            _reap(children)
+            now = time.monotonic()
+            if children:
+                last_active = now
+            elif now - last_active >= idle_timeout:
+                break
+            # Wake up now and then to reap the children and check for idleness
+            ready, _, _ = select.select([listener], [], [], min(1.0, idle_timeout))
+            if not ready:
+                continue
+            conn, _ = listener.accept()
+            # A client that does not send its request must not block the others
+            conn.settimeout(5)
+            last_active = time.monotonic()
+            reader = _Reader(conn)
+            try:
+                if not _peer_is_us(conn):
+                    continue
+                request = reader.read(max_fds=3)
+                if request is None:
+                    continue
+                if request.get('code') != code:
+                    _send(conn, {'error': 'the daemon runs other rppc code, restarting'})
+                    break
+                command = request.get('command')
+                if command == 'status':
+                    _reap(children)
+                    _send(conn, {'pid': os.getpid(), 'version': _version(), 'served': served,
+                                 'running': len(children), 'uptime': round(now - started, 1)})
+                elif command == 'stop':
+                    _send(conn, {'stopping': os.getpid()})
+                    break
+                elif len(reader.fds) == 3:
+                    pid = os.fork()
+                    if pid == 0:
+                        listener.close()
+                        _run_command(conn, request, reader.fds)
+                    children.add(pid)
+                    served += 1
+                else:
+                    _send(conn, {'error': 'Commands need the standard input, output and error'})
+            except (OSError, ValueError, DaemonError):
+                pass
+            finally:
+                for fd in reader.fds:
+                    os.close(fd)
+                conn.close()
+    finally:
+        listener.close()
+        # A daemon started since may have replaced the socket
+        try:
+            if os.stat(path).st_ino == inode:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _connect(path):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+def start(path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Starts a daemon in the background and waits for it to listen.
+
+    Args:
+        path (str): Socket to listen on, see :func:`socket_path`.
+        idle_timeout (float): Seconds without a command running before exiting.
+    Returns:
+        socket.socket: A connection to the daemon.
+    """
+    path = path or socket_path()
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    # The daemon must import this very rppc, installed or not
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    with open(os.path.join(os.path.dirname(path), 'daemon.log'), 'ab') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'rppc.daemon', '--socket', path,
+                                    '--idle-timeout', str(idle_timeout)],
+                                   stdin=subprocess.DEVNULL, stdout=log, stderr=log, cwd='/', env=env,
+                                   start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while True:
+        try:
+            return _connect(path)
+        except OSError:
+            if process.poll() is not None and process.returncode != 0:
+                # Lost a race with another client starting one, maybe
+                try:
+                    return _connect(path)
+                except OSError:
+                    raise DaemonError(f'The daemon exited with status {process.returncode}, '
+                                      f'see {log.name}') from None
+            if time.monotonic() > deadline:
+                raise DaemonError(f'The daemon did not start within {START_TIMEOUT} s') from None
+            time.sleep(0.01)
+
+
+def request(message, path=None):
+    """
+    Sends a ``status`` or ``stop`` command to the daemon.
+
+    Args:
+        message (dict): The command.
+        path (str): Socket of the daemon, see :func:`socket_path`.
+    Returns:
+        dict: The answer of the daemon.
+    """
+    try:
+        conn = _connect(path or socket_path())
+    except OSError as e:
+        raise DaemonError(f'No daemon is running: {e}') from None
+    with conn:
+        _send(conn, dict(message, code=code_id()))
+        answer = _Reader(conn).read()
+    if answer is None:
+        raise DaemonError('The daemon closed the connection')
+    return answer
+
+
+def call(argv, path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Runs an ``rppc`` command in the daemon, starting it if needed.
+
+    Args:
+        argv (list): The arguments of the command, without ``rppc``.
+        path (str): Socket of the daemon, see :func:`socket_path`.
+        idle_timeout (float): Idle timeout of a daemon started by this call.
+    Returns:
+        int: The exit status of the command.
+    Raises:
+        DaemonError: If the command could not be run by a daemon.
+    """
+    path = path or socket_path()
+    try:
+        conn = _connect(path)
+    except OSError:
+        conn = start(path, idle_timeout)
+    umask = os.umask(0)
+    os.umask(umask)
+    message = {'argv': list(argv), 'cwd': os.getcwd(), 'env': dict(os.environ), 'umask': umask,
+               'code': code_id()}
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with conn:
+        try:
+            _send(conn, message, fds=(0, 1, 2))
+        except OSError as e:
+            raise DaemonError(f'Cannot reach the daemon: {e}') from None
+        reader = _Reader(conn)
+        pid = None
+        handlers = dict()
+
+        def forward(signum, frame):
+            os.kill(pid, signum)
+
+        try:
+            while True:
+                answer = reader.read()
+                if answer is None and pid is not None:
+                    # The command started, running it again here could do it twice
+                    print(f'rppc daemon: command process {pid} died', file=sys.stderr)
+                    return 1
+                if answer is None:
+                    raise DaemonError('The daemon closed the connection')
+                if 'error' in answer:
+                    raise DaemonError(answer['error'])
+                if 'pid' in answer:
+                    pid = answer['pid']
+                    for signum in (signal.SIGINT, signal.SIGTERM):
+                        handlers[signum] = signal.signal(signum, forward)
+                if 'exit' in answer:
+                    return answer['exit']
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='rppc daemon')
+    parser.add_argument('--socket', default=None, help='Socket to listen on')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help='Seconds without a command before exiting')
+    args = parser.parse_args()
+    serve(args.socket, args.idle_timeout)
+
+
+if __name__ == '__main__':
+    main()
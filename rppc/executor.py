@@ -0,0 +1,352 @@
+"""Run external commands, and keep track of what they cost.
+
+Commands are run from their argument list, without a shell, in an explicit
+working directory, with a timeout, and a failure raises :class:`CommandError`
+along with what the command printed. Every command run is recorded with
+its wall-clock time and, where the platform reports it, the CPU time and
+maximum resident set size of the process, so that :meth:`Executor.report`
+can tell which external tool is slow.
+
+A process-wide :class:`Executor`, shared by the module functions, limits
+how many commands run at once, whichever thread starts them. Commands run
+within :func:`recording` are also collected apart from the others, so that
+a package created among others in the same process gets its own report.
+"""
+import contextlib
+import contextvars
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import profiling
+
+# Seconds a command may run before it is killed
+DEFAULT_TIMEOUT = 300
+DEFAULT_CONCURRENCY = min(8, os.cpu_count() or 1)
+
+_executor = None
+_lock = threading.Lock()
+_recorders = contextvars.ContextVar('rppc_executor_recorders', default=())
+
+
+class CommandError(Exception):
+    """Raised when a command fails, or runs past its timeout."""
+
+    def __init__(self, args, returncode, stdout=None, stderr=None, timed_out=False):
+        command = ' '.join(args)
+        if timed_out:
+            message = f'Command timed out: {command}'
+        else:
+            message = f'Command failed with status {returncode}: {command}'
+        output = (stderr or stdout or b'').decode('utf-8', 'replace').strip()
+        if output:
+            message = f'{message}\n{output}'
+        super().__init__(message)
+        self.command = list(args)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+
+
+class CommandResult:
+    """
+    The outcome of a command.
+
+    Attributes:
+        args (list): The command.
+        cwd (str): Where it ran.
+        returncode (int): Its exit status, ``None`` if it timed out.
+        stdout (bytes): What it printed, ``None`` unless captured.
+        stderr (bytes): What it printed on stderr, ``None`` unless captured.
+        wall (float): Wall-clock seconds, waiting for a slot excluded.
+        user (float): User CPU seconds, ``None`` if unknown.
+        system (float): System CPU seconds, ``None`` if unknown.
+        max_rss (int): Maximum resident set size in bytes, ``None`` if unknown.
+            Linux does not reset it on ``exec``, so it is at least the size
+            of the Python process that started the command.
+    """
+
+    def __init__(self, args, cwd, returncode, stdout, stderr, wall, rusage=None):
+        self.args = list(args)
+        self.cwd = cwd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.wall = wall
+        self.user = self.system = self.max_rss = None
+        if rusage is not None:
+            self.user = rusage.ru_utime
+            self.system = rusage.ru_stime
+            # Linux reports kilobytes, macOS bytes
+            self.max_rss = rusage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    def as_dict(self):
+        """dict: The result, without the output, for reports."""
+        return {'args': self.args, 'cwd': self.cwd, 'returncode': self.returncode,
+                'wall': round(self.wall, 6), 'user': self.user, 'system': self.system,
+                'max_rss': self.max_rss}
+
+    def __repr__(self):
+        return f'CommandResult({self.args!r}, returncode={self.returncode}, wall={self.wall:.3f})'
+
+
+def _communicate(process, input, timeout):
+    """
+    Like :meth:`subprocess.Popen.communicate`, but reaps the process with
+    :func:`os.wait4`, which also reports its resource usage.
+
+    Args:
+        process (subprocess.Popen): The process, its pipes not used yet.
+        input (bytes): Sent to its standard input, if it is a pipe.
+        timeout (float): Seconds before it is killed, ``None`` for never.
+    Returns:
+        tuple: Its standard output and error, ``None`` unless piped, whether
+        it was killed for running past the timeout, and its resource usage,
+        ``None`` where the platform does not report it.
+    """
+    if not (hasattr(os, 'wait4') and hasattr(os, 'waitid')):
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+            return stdout, stderr, False, None
+        except subprocess.TimeoutExpired:
+            process.kill()
+            stdout, stderr = process.communicate()
+            return stdout, stderr, True, None
+
+    outputs = dict()
+
+    def read(stream):
+        with stream:
+            outputs[stream] = stream.read()
+
+    def write(stream):
+        with contextlib.suppress(BrokenPipeError), stream:
+            stream.write(input or b'')
+
+    threads = [threading.Thread(target=read, args=(stream,), daemon=True)
+               for stream in (process.stdout, process.stderr) if stream is not None]
+    if process.stdin is not None:
+        threads.append(threading.Thread(target=write, args=(process.stdin,), daemon=True))
+    lock = threading.Lock()
+    exited = killed = False
+
+    def kill():
+        nonlocal killed
+        with lock:
+            if not exited:
+                os.kill(process.pid, signal.SIGKILL)
+                killed = True
+
+    timer = threading.Timer(timeout, kill) if timeout is not None else None
+    for thread in filter(None, threads + [timer]):
+        thread.start()
+    # Waits without reaping first, so that kill cannot hit another process reusing the pid
+    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+    with lock:
+        exited = True
+    if timer:
+        timer.cancel()
+    _, status, rusage = os.wait4(process.pid, 0)
+    # Popen does not wait for a process whose status it has
+    process.returncode = os.waitstatus_to_exitcode(status)
+    for thread in threads:
+        thread.join()
+    return outputs.get(process.stdout), outputs.get(process.stderr), killed, rusage
+
+
+class Executor:
+    """
+    Runs commands, at most ``max_concurrency`` at once, recording each run.
+
+    Args:
+        max_concurrency (int): Maximum number of commands running at once,
+            other callers wait for a slot.
+        timeout (float): Default timeout of a command in seconds, ``None``
+            for none.
+        env (dict): Variables added to the environment of every command.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, env=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.env = dict(env or {})
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.results = []
+
+    def run(self, args, cwd=None, env=None, input=None, timeout=None, check=True, capture=True):
+        """
+        Runs a command and waits for it.
+
+        Args:
+            args (list): The program and its arguments, no shell is involved.
+            cwd (str): Directory to run in, the current one by default.
+            env (dict): Variables added to the environment of the command.
+            input (bytes): Sent to the standard input of the command.
+            timeout (float): Seconds before the command is killed, the
+                executor's default if not given.
+            check (bool): Raise :class:`CommandError` when the command fails.
+            capture (bool): Capture the output, instead of letting it through.
+        Returns:
+            CommandResult: The result.
+        """
+        args = [os.fspath(arg) for arg in args]
+        if timeout is None:
+            timeout = self.timeout
+        command_env = None
+        if self.env or env:
+            command_env = dict(os.environ, **self.env, **(env or {}))
+        pipe = subprocess.PIPE if capture else None
+
+        with self._slots, profiling.span(program_name(args), 'command', command=' '.join(args),
+                                         cwd=cwd) as attributes:
+            start = time.perf_counter()
+            stdin = subprocess.PIPE if input is not None else subprocess.DEVNULL
+            with subprocess.Popen(args, cwd=cwd, env=command_env, stdin=stdin, stdout=pipe,
+                                  stderr=pipe) as process:
+                stdout, stderr, timed_out, rusage = _communicate(process, input, timeout)
+            wall = time.perf_counter() - start
+            result = CommandResult(args, cwd or os.getcwd(), None if timed_out else process.returncode,
+                                   stdout, stderr, wall, rusage)
+            attributes.update(returncode=result.returncode, user=result.user, system=result.system,
+                              max_rss=result.max_rss)
+
+        with self._lock:
+            self.results.append(result)
+        for recorder in _recorders.get():
+            recorder.append(result)
+        if timed_out or (check and process.returncode != 0):
+            raise CommandError(args, result.returncode, stdout, stderr, timed_out=timed_out)
+        return result
+
+    def run_many(self, commands, **kwargs):
+        """
+        Runs several commands concurrently, within the concurrency limit.
+
+        Args:
+            commands (list): Argument lists of the commands.
+            **kwargs: Passed to :meth:`run` for every command.
+        Returns:
+            list: The :class:`CommandResult` of each command, in order. The
+            first failure is raised once every command is done.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix='rppc-command') as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self.run, args, **kwargs)
+                       for args in commands]
+        return [future.result() for future in futures]
+
+    def report(self):
+        """
+        Summarizes the commands run so far.
+
+        Returns:
+            dict: ``commands``, every run, and ``programs``, the count and total
+            times of each program, keyed by the program name and, for ``git``,
+            its sub-command.
+        """
+        with self._lock:
+            results = list(self.results)
+        return summarize(results)
+
+    def clear(self):
+        """Forgets the commands run so far."""
+        with self._lock:
+            self.results = []
+
+
+def program_name(args):
+    """str: Name of the program of a command, and for ``git`` its sub-command."""
+    name = os.path.basename(args[0])
+    if name == 'git':
+        subcommand = next((arg for arg in args[1:] if not arg.startswith('-') and '=' not in arg), None)
+        name = f'git {subcommand}' if subcommand else name
+    return name
+
+
+def summarize(results):
+    """
+    Summarizes command results, see :meth:`Executor.report`.
+
+    Args:
+        results (list): The :class:`CommandResult` to summarize.
+    Returns:
+        dict: ``commands`` and ``programs``.
+    """
+    programs = dict()
+    for result in results:
+        total = programs.setdefault(program_name(result.args),
+                                    {'count': 0, 'wall': 0.0, 'user': 0.0, 'system': 0.0, 'max_rss': 0})
+        total['count'] += 1
+        total['wall'] += result.wall
+        total['user'] += result.user or 0.0
+        total['system'] += result.system or 0.0
+        total['max_rss'] = max(total['max_rss'], result.max_rss or 0)
+    return {'commands': [result.as_dict() for result in results], 'programs': programs}
+
+
+@contextlib.contextmanager
+def recording():
+    """
+    Collects the commands run in the current context, by any executor.
+
+    The context is the calling thread, and the steps a :class:`rppc.pipeline.Pipeline`
+    started from it, but not other threads. Recordings nest.
+
+    Example::
+
+        with executor.recording() as results:
+            create_package(context)
+        executor.summarize(results)
+
+    Returns:
+        list: The :class:`CommandResult` of the commands, filled as they finish.
+    """
+    results = []
+    token = _recorders.set(_recorders.get() + (results,))
+    try:
+        yield results
+    finally:
+        _recorders.reset(token)
+
+
+def configure(**kwargs):
+    """
+    Replaces the shared executor by one with other settings, see :class:`Executor`.
+
+    Returns:
+        None
+    """
+    global _executor
+    with _lock:
+        _executor = Executor(**kwargs)
+
+
+def get_executor():
+    """
+    Retrieves the process-wide executor, creating it on first use.
+
+    Returns:
+        Executor: The shared executor.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = Executor()
+    return _executor
+
+
+def run(args, **kwargs):
+    """Runs a command with the shared executor, see :meth:`Executor.run`."""
+    return get_executor().run(args, **kwargs)
+
+
+def run_many(commands, **kwargs):
+    """Runs several commands with the shared executor, see :meth:`Executor.run_many`."""
+    return get_executor().run_many(commands, **kwargs)
@@ -0,0 +1,116 @@
+import os
+import threading
+
+from .utils import user_cache_dir
+
+
+# Templates shipped with rppc
+BUNDLED_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gitignore')
+DEFAULT_TEMPLATES = ['Python', 'Jupyter']
+
+_template_cache = dict()
+_template_lock = threading.Lock()
+
+
+def template_dirs():
+    """
+    Directories searched for ``<Name>.gitignore`` templates.
+
+    Templates in the user cache directory (``<cache>/gitignore``)
+    take precedence over the bundled ones.
+
+    Returns:
+        list: Full paths to the template directories, by precedence.
+    """
+    return [os.path.join(user_cache_dir(), 'gitignore'), BUNDLED_TEMPLATES]
+
+
+def available_templates():
+    """
+    Lists the names of the available templates.
+
+    Returns:
+        list: Sorted template names, e.g. ``['Editors', 'Jupyter', ...]``.
+    """
+    names = set()
+    for template_dir in template_dirs():
+        if os.path.isdir(template_dir):
+            names.update(f[:-len('.gitignore')] for f in os.listdir(template_dir)
+                         if f.endswith('.gitignore'))
+    return sorted(names)
+
+
+def load_template(name):
+    """
+    Loads a template, templates are read from disk once per process.
+
+    Args:
+        name (str): Template name, e.g. ``Python``.
+    Returns:
+        str: The template text.
+    Raises:
+        KeyError: If there is no such template, or ``name`` is not a plain name.
+    """
+    # Names come from specs, possibly sent to ``rppc serve``, they must not reach other files
+    if not isinstance(name, str) or not name or name.startswith('.') or '/' in name or os.sep in name \
+            or (os.altsep and os.altsep in name):
+        raise KeyError(f'Invalid gitignore template name: {name!r}')
+    for template_dir in template_dirs():
+        path = os.path.join(template_dir, f'{name}.gitignore')
+        with _template_lock:
+            if path in _template_cache:
+                return _template_cache[path]
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                text = f.read()
+            with _template_lock:
+                _template_cache[path] = text
+            return text
+    raise KeyError(f"Unknown gitignore template: {name}, available: {', '.join(available_templates())}")
+
+
+def compose(names=None):
+    """
+    Composes several templates into a single ``.gitignore``.
+
+    Each template becomes a section, rules already given by an earlier
+    template are dropped, and so are the comments and blank lines
+    left without any rule.
+
+    Args:
+        names (list): Template names. Defaults to ``DEFAULT_TEMPLATES``.
+    Returns:
+        str: The ``.gitignore`` text.
+    """
+    if names is None:
+        names = DEFAULT_TEMPLATES
+
+    seen = set()
+    sections = []
+    for name in names:
+        kept = []
+        pending = []
+        dropped = False
+        for line in load_template(name).splitlines():
+            rule = line.strip()
+            if not rule or rule.startswith('#'):
+                if dropped:
+                    # Every rule under the pending comments was a duplicate
+                    pending = []
+                    dropped = False
+                # Comments and blank lines only survive if a rule follows
+                pending.append(line.rstrip())
+                continue
+            if rule in seen:
+                dropped = True
+                continue
+            dropped = False
+            seen.add(rule)
+            kept.extend(pending)
+            pending = []
+            kept.append(rule)
+        while kept and not kept[0]:
+            kept.pop(0)
+        if kept:
+            sections.append('\n'.join([f'### {name} ###'] + kept))
+    return '\n\n'.join(sections) + '\n'
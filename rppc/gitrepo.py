@@ -0,0 +1,366 @@
+"""Create the git repository of a package from its rendered files.
+
+Rather than ``git init``, ``git add .`` and ``git commit``, which hash
+every file written to disk again, the repository skeleton is written
+directly and the files of the :class:`~rppc.tree.FileTree` are either
+streamed, along with the commit, into a single ``git fast-import``
+process, or written without running git at all by :func:`write_commit`:
+the blobs, trees and commit go to one packfile, then the branch and the
+index are written.
+"""
+import os
+import struct
+import time
+import zlib
+
+DEFAULT_BRANCH = 'master'
+COMMIT_MESSAGE = 'Initialize package repository'
+
+GIT_CONFIG = """[core]
+\trepositoryformatversion = 0
+\tfilemode = true
+\tbare = false
+\tlogallrefupdates = true
+"""
+
+
+def init_repository(package_dir, branch=DEFAULT_BRANCH):
+    """
+    Creates an empty repository, like ``git init`` without its sample hooks.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        branch (str): Name of the initial branch.
+    Returns:
+        str: Full path to the ``.git`` directory.
+    """
+    git_dir = os.path.join(package_dir, '.git')
+    for path in ('objects/info', 'objects/pack', 'refs/heads', 'refs/tags', 'info'):
+        os.makedirs(os.path.join(git_dir, path), exist_ok=True)
+    for name, content in (('HEAD', f'ref: refs/heads/{branch}\n'),
+                          ('config', GIT_CONFIG),
+                          ('description', 'Unnamed repository; edit this file to name it for gitweb.\n'),
+                          ('info/exclude', '')):
+        with open(os.path.join(git_dir, name), 'w') as f:
+            f.write(content)
+    return git_dir
+
+
+def identity(author_name, author_email):
+    """
+    Resolves who authors and commits, giving git's environment variables precedence.
+
+    Args:
+        author_name (str): Name to use when ``GIT_AUTHOR_NAME`` is not set.
+        author_email (str): Email to use when ``GIT_AUTHOR_EMAIL`` is not set.
+    Returns:
+        tuple: ``(name, email)`` of the author and of the committer.
+    """
+    author = (os.environ.get('GIT_AUTHOR_NAME', author_name),
+              os.environ.get('GIT_AUTHOR_EMAIL', author_email))
+    committer = (os.environ.get('GIT_COMMITTER_NAME', author[0]),
+                 os.environ.get('GIT_COMMITTER_EMAIL', author[1]))
+    return author, committer
+
+
+def signature(name, email, when=None):
+    """bytes: ``Name <email> seconds +hhmm``, as git records who and when."""
+    if when is None:
+        when = time.time()
+    offset = time.localtime(when).tm_gmtoff // 60
+    sign = '-' if offset < 0 else '+'
+    zone = f'{sign}{abs(offset) // 60:02d}{abs(offset) % 60:02d}'
+    return f'{name} <{email}> {int(when)} {zone}'.encode('utf-8')
+
+
+def _quote_path(path):
+    if path.startswith('"') or '\n' in path or '\\' in path:
+        escaped = path.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return f'"{escaped}"'
+    return path
+
+
+def _data(content):
+    return b'data %d\n' % len(content) + content + b'\n'
+
+
+def fast_import_stream(package_tree, message=COMMIT_MESSAGE, author=None, committer=None,
+                       when=None, branch=DEFAULT_BRANCH):
+    """
+    Builds the ``git fast-import`` stream of a commit of every file of a tree.
+
+    Files with the same content share a single blob.
+
+    Args:
+        package_tree (FileTree): The files to commit.
+        message (str): The commit message.
+        author (tuple): ``(name, email)`` of the author.
+        committer (tuple): ``(name, email)`` of the committer, the author by default.
+        when (float): Commit time in seconds since the epoch, now by default.
+        branch (str): The branch to commit to.
+    Returns:
+        bytes: The stream.
+    """
+    if committer is None:
+        committer = author
+    if when is None:
+        when = time.time()
+    chunks = []
+    marks = dict()
+    files = []
+    for path, content, mode in package_tree.items():
+        if content not in marks:
+            marks[content] = len(marks) + 1
+            chunks.append(b'blob\nmark :%d\n' % marks[content] + _data(content))
+        git_mode = '100755' if mode & 0o111 else '100644'
+        files.append(f'M {git_mode} :{marks[content]} {_quote_path(path)}\n'.encode('utf-8'))
+
+    chunks.append(f'commit refs/heads/{branch}\n'.encode('utf-8'))
+    chunks.append(b'author ' + signature(*author, when=when) + b'\n')
+    chunks.append(b'committer ' + signature(*committer, when=when) + b'\n')
+    chunks.append(_data(message.rstrip('\n').encode('utf-8') + b'\n'))
+    chunks.extend(files)
+    chunks.append(b'\ndone\n')
+    return b''.join(chunks)
+
+
+def fast_import(package_dir, stream):
+    """
+    Imports a stream into the repository of a package and checks its branch out.
+
+    The working tree is expected to match the stream already, so only the
+    index is written, from the imported commit.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        stream (bytes): See :func:`fast_import_stream`.
+    Returns:
+        None
+    """
+    from . import executor
+
+    # Keep the objects in the one packfile, small imports are unpacked otherwise
+    executor.run(['git', '-c', 'fastimport.unpackLimit=1', 'fast-import', '--quiet', '--done'],
+                 input=stream, cwd=package_dir)
+    executor.run(['git', 'read-tree', 'HEAD'], cwd=package_dir)
+
+
+def create_bundle(package_dir, bundle_file, branch=DEFAULT_BRANCH):
+    """
+    Exports the branch of a package repository as a git bundle.
+
+    The bundle can be cloned from, or fetched, like a remote repository.
+    It includes ``HEAD``, so that clones check the branch out whatever
+    their ``init.defaultBranch``.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        bundle_file (str): Where to write the bundle.
+        branch (str): The branch to export.
+    Returns:
+        str: Full path to the bundle.
+    """
+    from . import executor
+
+    bundle_file = os.path.abspath(bundle_file)
+    executor.run(['git', 'bundle', 'create', '--quiet', bundle_file, 'HEAD', branch], cwd=package_dir)
+    return bundle_file
+
+
+OBJECT_TYPES = {'commit': 1, 'tree': 2, 'blob': 3}
+
+
+def object_id(kind, content):
+    """bytes: Binary sha1 of a git object of type ``kind``."""
+    import hashlib
+
+    return hashlib.sha1(b'%s %d\0' % (kind.encode('ascii'), len(content)) + content).digest()
+
+
+def _tree_entries(package_tree):
+    root = dict()
+    for path, content, mode in package_tree.items():
+        *parents, name = path.split('/')
+        node = root
+        for parent in parents:
+            node = node.setdefault(parent, dict())
+        node[name] = (content, mode)
+    return root
+
+
+def _add_tree(node, objects):
+    entries = []
+    for name, value in node.items():
+        if isinstance(value, dict):
+            entries.append((name + '/', b'40000', name, _add_tree(value, objects)))
+        else:
+            content, mode = value
+            oid = object_id('blob', content)
+            objects.setdefault(oid, ('blob', content))
+            entries.append((name, b'100755' if mode & 0o111 else b'100644', name, oid))
+    # Git sorts tree entries by name, directories as if their name ended with '/'
+    entries.sort(key=lambda entry: entry[0].encode('utf-8'))
+    content = b''.join(mode + b' ' + name.encode('utf-8') + b'\0' + oid
+                       for _, mode, name, oid in entries)
+    oid = object_id('tree', content)
+    objects.setdefault(oid, ('tree', content))
+    return oid
+
+
+def commit_objects(package_tree, message=COMMIT_MESSAGE, author=None, committer=None, when=None):
+    """
+    Builds the objects of a commit of every file of a tree.
+
+    Args:
+        package_tree (FileTree): The files to commit.
+        message (str): The commit message.
+        author (tuple): ``(name, email)`` of the author.
+        committer (tuple): ``(name, email)`` of the committer, the author by default.
+        when (float): Commit time in seconds since the epoch, now by default.
+    Returns:
+        tuple: The binary sha1 of the commit, and a dict of every object
+        by binary sha1, as ``(type, content)``.
+    """
+    if committer is None:
+        committer = author
+    if when is None:
+        when = time.time()
+    objects = dict()
+    tree_id = _add_tree(_tree_entries(package_tree), objects)
+    content = b''.join([
+        b'tree ' + tree_id.hex().encode('ascii') + b'\n',
+        b'author ' + signature(*author, when=when) + b'\n',
+        b'committer ' + signature(*committer, when=when) + b'\n',
+        b'\n',
+        message.rstrip('\n').encode('utf-8') + b'\n',
+    ])
+    commit_id = object_id('commit', content)
+    objects[commit_id] = ('commit', content)
+    return commit_id, objects
+
+
+def _pack_header(kind, size):
+    byte = (OBJECT_TYPES[kind] << 4) | (size & 0x0f)
+    size >>= 4
+    header = bytearray()
+    while size:
+        header.append(byte | 0x80)
+        byte = size & 0x7f
+        size >>= 7
+    header.append(byte)
+    return bytes(header)
+
+
+def write_pack(git_dir, objects):
+    """
+    Writes objects to a new packfile, with its index, without deltas.
+
+    Args:
+        git_dir (str): Full path to the ``.git`` directory.
+        objects (dict): ``(type, content)`` of each object by binary sha1.
+    Returns:
+        str: Full path to the packfile.
+    """
+    import hashlib
+
+    pack = [b'PACK' + struct.pack('>II', 2, len(objects))]
+    offset = len(pack[0])
+    entries = []
+    for oid, (kind, content) in objects.items():
+        packed = _pack_header(kind, len(content)) + zlib.compress(content)
+        entries.append((oid, zlib.crc32(packed), offset))
+        pack.append(packed)
+        offset += len(packed)
+    pack = b''.join(pack)
+    pack_id = hashlib.sha1(pack).digest()
+    pack += pack_id
+
+    entries.sort()
+    fanout = [0] * 256
+    for oid, _, _ in entries:
+        fanout[oid[0]] += 1
+    total = 0
+    for i, count in enumerate(fanout):
+        total += count
+        fanout[i] = total
+    index = b''.join([
+        b'\377tOc', struct.pack('>I', 2),
+        struct.pack('>256I', *fanout),
+        b''.join(oid for oid, _, _ in entries),
+        b''.join(struct.pack('>I', crc) for _, crc, _ in entries),
+        b''.join(struct.pack('>I', offset) for _, _, offset in entries),
+        pack_id,
+    ])
+    index += hashlib.sha1(index).digest()
+
+    name = os.path.join(git_dir, 'objects', 'pack', f'pack-{pack_id.hex()}')
+    # The index last, git only looks for packs through their index
+    for suffix, content in (('.pack', pack), ('.idx', index)):
+        with open(name + suffix, 'wb') as f:
+            f.write(content)
+        os.chmod(name + suffix, 0o444)
+    return name + '.pack'
+
+
+def write_index(package_dir, package_tree):
+    """
+    Writes the git index of files already written to the package directory.
+
+    The index records the stat data of each file, so that git sees them as
+    unchanged without hashing them again.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        package_tree (FileTree): The files, as written to ``package_dir``.
+    Returns:
+        None
+    """
+    import hashlib
+
+    entries = []
+    for path, content, mode in sorted(package_tree.items(), key=lambda item: item[0].encode('utf-8')):
+        st = os.stat(os.path.join(package_dir, path))
+        name = path.encode('utf-8')
+        entry = struct.pack(
+            '>10I20sH',
+            int(st.st_ctime) & 0xffffffff, st.st_ctime_ns % 1000000000,
+            int(st.st_mtime) & 0xffffffff, st.st_mtime_ns % 1000000000,
+            st.st_dev & 0xffffffff, st.st_ino & 0xffffffff,
+            0o100755 if mode & 0o111 else 0o100644,
+            st.st_uid & 0xffffffff, st.st_gid & 0xffffffff, st.st_size & 0xffffffff,
+            object_id('blob', content), min(len(name), 0xfff),
+        ) + name
+        # Entries are NUL padded to a multiple of 8 bytes, with at least one NUL
+        entries.append(entry + b'\0' * (8 - len(entry) % 8))
+    index = b'DIRC' + struct.pack('>II', 2, len(entries)) + b''.join(entries)
+    with open(os.path.join(package_dir, '.git', 'index'), 'wb') as f:
+        f.write(index + hashlib.sha1(index).digest())
+
+
+def write_commit(package_dir, package_tree, message=COMMIT_MESSAGE, author=None, committer=None,
+                 when=None, branch=DEFAULT_BRANCH):
+    """
+    Commits every file of a tree to a repository created by :func:`init_repository`.
+
+    No git process is run: the objects are written to a packfile, then the
+    branch and the index. The files must be written to ``package_dir``
+    already.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        package_tree (FileTree): The files to commit.
+        message (str): The commit message.
+        author (tuple): ``(name, email)`` of the author.
+        committer (tuple): ``(name, email)`` of the committer, the author by default.
+        when (float): Commit time in seconds since the epoch, now by default.
+        branch (str): The branch to commit to.
+    Returns:
+        str: The sha1 of the commit.
+    """
+    git_dir = os.path.join(package_dir, '.git')
+    commit_id, objects = commit_objects(package_tree, message, author, committer, when)
+    write_pack(git_dir, objects)
+    with open(os.path.join(git_dir, 'refs', 'heads', branch), 'w') as f:
+        f.write(commit_id.hex() + '\n')
+    write_index(package_dir, package_tree)
+    return commit_id.hex()
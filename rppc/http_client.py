@@ -0,0 +1,152 @@
+"""Shared HTTP client for every network call made by rppc.
+
+A single pooled :class:`requests.Session` is kept per process, so the
+TLS handshake with GitHub happens once instead of once per request.
+Requests get connect/read timeouts by default, and failed connections
+or retryable statuses (``429`` and ``5xx``) are retried a bounded number
+of times with jittered exponential backoff. Only idempotent methods are
+retried once the request has been sent.
+"""
+import os
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import profiling
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+# Number of hosts to keep a connection pool for, and connections per host
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 8
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_config = {
+    'timeout': DEFAULT_TIMEOUT,
+    'retries': DEFAULT_RETRIES,
+    'backoff_factor': DEFAULT_BACKOFF_FACTOR,
+    'pool_connections': DEFAULT_POOL_CONNECTIONS,
+    'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+}
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+class JitteredRetry(Retry):
+    """:class:`Retry` whose backoff is randomized between half and all of its value."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class TimeoutSession(requests.Session):
+    """:class:`requests.Session` applying a default timeout to every request."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        with profiling.span(f'{method} {url.split("?", 1)[0]}', 'http', url=url) as attributes:
+            response = super().request(method, url, **kwargs)
+            attributes['status'] = response.status_code
+            return response
+
+
+def create_session(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                   backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                   pool_connections=DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Creates a pooled session with timeouts and retries.
+
+    Args:
+        timeout (float or tuple): Default ``(connect, read)`` timeout in seconds.
+        retries (int): Maximum number of retries of a request.
+        backoff_factor (float): Base of the exponential backoff in seconds.
+        pool_connections (int): Number of hosts to keep a pool for.
+        pool_maxsize (int): Maximum number of connections per host, requests
+            beyond that wait for a free connection.
+    Returns:
+        TimeoutSession: The new session.
+    """
+    retry = JitteredRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=True,
+                          max_retries=retry)
+    session = TimeoutSession(timeout=timeout)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def configure(**kwargs):
+    """
+    Changes the settings of the shared session, see :func:`create_session`.
+
+    The current session is closed and a new one is created on next use.
+
+    Returns:
+        None
+    """
+    global _session
+    unknown = set(kwargs) - set(_config)
+    if unknown:
+        raise TypeError(f"Unknown http client settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _config.update(kwargs)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """
+    Retrieves the process-wide session, creating it on first use.
+
+    A forked child gets its own session, pooled connections must not
+    be shared across processes.
+
+    Returns:
+        TimeoutSession: The shared session.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = create_session(**_config)
+                _session_pid = os.getpid()
+    return _session
+
+
+def request(method, url, **kwargs):
+    """Sends a request through the shared session, see :meth:`requests.Session.request`."""
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Sends a ``GET`` request through the shared session."""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Sends a ``POST`` request through the shared session."""
+    return request('POST', url, **kwargs)
@@ -0,0 +1,324 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+from .utils import GITHUB_API_URL, user_cache_dir
+
+
+LICENSES_URL = '/'.join([GITHUB_API_URL, 'licenses'])
+# GitHub's license list changes a few times a year at most
+DEFAULT_TTL = 24 * 60 * 60
+# Snapshot of the GitHub license corpus shipped with rppc
+BUNDLED_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'licenses.json')
+CORPUS_FORMAT = 1
+# The placeholders filled in by ``render_license``
+PLACEHOLDER_RE = re.compile(r'\[(year|fullname)\]')
+
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_file, entry):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # Write to a temporary file first so concurrent readers
+    # never see a half written cache
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_file, cache_file)
+
+
+def cached_get_json(url, cache_file, ttl=DEFAULT_TTL):
+    """
+    Retrieves json from ``url`` through an on-disk cache.
+
+    A cached response younger than ``ttl`` seconds is returned without
+    touching the network. An older one is revalidated with its ``ETag``,
+    so an unchanged resource costs a ``304`` and no rate limit.
+    If the network is unavailable, a stale cache is still returned.
+
+    Args:
+        url (str): The url to retrieve.
+        cache_file (str): Full path to the cache file for this url.
+        ttl (int): Number of seconds a cached response stays fresh.
+    Returns:
+        dict or list: The decoded json response.
+    """
+    cached = _read_cache(cache_file)
+    if cached is not None and time.time() - cached['fetched_at'] < ttl:
+        return cached['data']
+
+    import requests
+
+    from . import http_client
+
+    headers = {}
+    if cached is not None and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    try:
+        req = http_client.get(url, headers=headers)
+    except requests.RequestException:
+        if cached is not None:
+            return cached['data']
+        raise
+
+    if req.status_code == 304 and cached is not None:
+        cached['fetched_at'] = time.time()
+        _write_cache(cache_file, cached)
+        return cached['data']
+    if req.status_code != 200:
+        if cached is not None:
+            return cached['data']
+        raise Exception(req.text)
+
+    data = req.json()
+    _write_cache(cache_file, {
+        'url': url,
+        'etag': req.headers.get('ETag'),
+        'fetched_at': time.time(),
+        'data': data
+    })
+    return data
+
+
+def parse_placeholders(body):
+    """
+    Finds the placeholders of a license body.
+
+    Args:
+        body (str): The license text, as served by GitHub.
+    Returns:
+        list: ``[start, end, field]`` of each placeholder, in order.
+    """
+    return [[m.start(), m.end(), m.group(1)] for m in PLACEHOLDER_RE.finditer(body)]
+
+
+def render_license(lic, **values):
+    """
+    Renders a license body in a single pass over its pre-parsed placeholders.
+
+    Args:
+        lic (dict): License entry from the corpus.
+        **values: Value of each placeholder field, e.g. ``year`` and ``fullname``.
+    Returns:
+        str: The license text.
+    """
+    body = lic['body']
+    pieces = []
+    last = 0
+    for start, end, field in lic['placeholders']:
+        pieces.append(body[last:start])
+        pieces.append(str(values.get(field, body[start:end])))
+        last = end
+    pieces.append(body[last:])
+    return ''.join(pieces)
+
+
+def build_corpus(url=LICENSES_URL, cache_dir=None):
+    """
+    Builds a license corpus from the GitHub licenses API.
+
+    Every request is revalidated with its ``ETag``, so refreshing an
+    unchanged corpus costs little of the rate limit.
+
+    Args:
+        url (str): Url of the license list endpoint.
+        cache_dir (str): Directory holding the http cache.
+            Defaults to the user cache directory.
+    Returns:
+        dict: The corpus.
+    """
+    http_cache = os.path.join(cache_dir or user_cache_dir(), 'licenses', 'http')
+    licenses = []
+    for lic in cached_get_json(url, os.path.join(http_cache, 'index.json'), ttl=0):
+        detail = cached_get_json(lic['url'], os.path.join(http_cache, f"{lic['key']}.json"), ttl=0)
+        licenses.append({
+            'key': detail['key'],
+            'name': detail['name'],
+            'spdx_id': detail['spdx_id'],
+            'url': lic['url'],
+            'body': detail['body'],
+            'placeholders': parse_placeholders(detail['body'])
+        })
+    return {
+        'format': CORPUS_FORMAT,
+        'version': datetime.datetime.now(datetime.timezone.utc).strftime('%Y.%m.%d'),
+        'source': url,
+        'licenses': licenses
+    }
+
+
+def load_corpus(corpus_file):
+    """
+    Loads a license corpus.
+
+    Args:
+        corpus_file (str): Full path to the corpus json.
+    Returns:
+        dict: The corpus.
+    """
+    with open(corpus_file, 'r') as f:
+        corpus = json.load(f)
+    if corpus.get('format') != CORPUS_FORMAT:
+        raise ValueError(f'Unsupported license corpus format in {corpus_file}')
+    return corpus
+
+
+class LicenseCatalog:
+    """
+    Lazily loaded catalog of the licenses offered by GitHub.
+
+    The catalog reads a local snapshot of the GitHub license corpus, either
+    the one bundled with rppc or a newer one written by :meth:`refresh`,
+    so using it never touches the network. Nothing is read until the
+    catalog is first used. Licenses can be looked up by their position in
+    the list (as presented to the user), or by SPDX id / GitHub license key,
+    e.g. ``catalog['MIT']``.
+
+    Args:
+        corpus_file (str): Full path to the corpus to use. Defaults to the
+            newest of the refreshed and the bundled corpus.
+        cache_dir (str): Directory holding the refreshed corpus.
+            Defaults to the user cache directory.
+    """
+
+    def __init__(self, corpus_file=None, cache_dir=None):
+        self.corpus_file = corpus_file
+        self.cache_dir = cache_dir
+        self._corpus = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def refreshed_corpus_file(self):
+        """str: Where :meth:`refresh` writes the corpus by default."""
+        return os.path.join(self.cache_dir or user_cache_dir(), 'licenses', 'corpus.json')
+
+    def _read_corpus(self):
+        if self.corpus_file is not None:
+            return load_corpus(self.corpus_file)
+        corpus = load_corpus(BUNDLED_CORPUS)
+        try:
+            refreshed = load_corpus(self.refreshed_corpus_file)
+        except (OSError, ValueError):
+            return corpus
+        # An older refresh must not shadow the snapshot of a newer rppc
+        if refreshed['version'] >= corpus['version']:
+            return refreshed
+        return corpus
+
+    def _load(self):
+        with self._lock:
+            if self._corpus is None:
+                corpus = self._read_corpus()
+                index = dict()
+                for lic in corpus['licenses']:
+                    index[lic['key'].lower()] = lic
+                    if lic.get('spdx_id'):
+                        index[lic['spdx_id'].lower()] = lic
+                self._index = index
+                self._corpus = corpus
+        return self._corpus
+
+    @property
+    def version(self):
+        """str: Version of the corpus in use."""
+        return (self._corpus or self._load())['version']
+
+    @property
+    def licenses(self):
+        """list: The licenses, in the order GitHub lists them."""
+        return (self._corpus or self._load())['licenses']
+
+    def by_spdx(self, spdx_id):
+        """
+        Looks up a license by SPDX id or GitHub license key.
+
+        Args:
+            spdx_id (str): SPDX id such as ``MIT``, or key such as ``mit``.
+        Returns:
+            dict: The license entry.
+        """
+        if self._index is None:
+            self._load()
+        try:
+            return self._index[spdx_id.lower()]
+        except KeyError:
+            raise KeyError(f'Unknown license: {spdx_id}') from None
+
+    def detail(self, selection):
+        """
+        Retrieves the full detail, including the body, of a license.
+
+        Args:
+            selection (int or str): License position or SPDX id.
+        Returns:
+            dict: The detail about the license.
+        """
+        return self[selection]
+
+    def render(self, selection, **values):
+        """
+        Renders the text of a license, see :func:`render_license`.
+
+        Args:
+            selection (int or str): License position or SPDX id.
+            **values: Value of each placeholder field.
+        Returns:
+            str: The license text.
+        """
+        return render_license(self[selection], **values)
+
+    def refresh(self, url=LICENSES_URL, output=None):
+        """
+        Downloads the current GitHub license corpus.
+
+        Args:
+            url (str): Url of the license list endpoint.
+            output (str): Where to write the corpus. Defaults to
+                :attr:`refreshed_corpus_file`.
+        Returns:
+            str: Full path to the written corpus.
+        """
+        corpus = build_corpus(url, self.cache_dir)
+        output = output or self.refreshed_corpus_file
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        tmp_file = f'{output}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(corpus, f, indent=1, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_file, output)
+        self.clear()
+        return output
+
+    def clear(self):
+        """Forgets the in-memory catalog, it is reloaded on next use."""
+        with self._lock:
+            self._corpus = None
+            self._index = None
+
+    def __getitem__(self, selection):
+        if isinstance(selection, str):
+            return self.by_spdx(selection)
+        return self.licenses[selection]
+
+    def __contains__(self, spdx_id):
+        try:
+            self.by_spdx(spdx_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.licenses)
+
+    def __len__(self):
+        return len(self.licenses)
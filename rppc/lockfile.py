@@ -0,0 +1,205 @@
+"""Record what rppc generated, to update a package later without clobbering edits.
+
+The ``.rppc-lock`` file of a package holds the specification it was
+generated from and, for each generated file, the git blob sha1 of the
+content rppc rendered (``rendered``) and of the content it left on disk
+(``written``), which differ for files merged on update. Using git blob
+hashes means the previous rendering of a file can be read back from the
+package's git objects as a merge base.
+
+Updating a package renders it again in memory, then for each file:
+
+* ``unchanged``: the rendering did not change, the file is not touched.
+* ``added``: a new file, written.
+* ``updated``: the file on disk is as rppc left it, it is replaced.
+* ``merged`` or ``conflict``: the file was changed since, the changes are
+  merged with ``git merge-file`` when merging is requested.
+* ``skipped``: the file was changed or deleted since, it is left alone.
+"""
+import json
+import os
+import tempfile
+
+from .utils import file_writer
+
+LOCK_FILE = '.rppc-lock'
+LOCK_FORMAT = 1
+
+UPDATE_STATUSES = ('unchanged', 'added', 'updated', 'merged', 'conflict', 'skipped')
+
+
+def blob_sha1(content):
+    """str: Git blob sha1 of ``content``, as ``git hash-object`` computes it."""
+    import hashlib
+
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _git(package_dir, *args, content=None):
+    from . import executor
+
+    try:
+        return executor.run(['git', *args], cwd=package_dir, input=content, check=False)
+    except FileNotFoundError:
+        return None
+
+
+def store_blob(package_dir, content):
+    """Writes ``content`` to the git objects of the package, if it is a repository."""
+    _git(package_dir, 'hash-object', '-w', '--stdin', content=content)
+
+
+def read_blob(package_dir, sha1):
+    """bytes: Content of a blob of the package's git objects, ``None`` if missing."""
+    result = _git(package_dir, 'cat-file', 'blob', sha1)
+    if result is None or result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def merge(current, base, other):
+    """
+    Three-way merges file contents with ``git merge-file``.
+
+    Args:
+        current (bytes): The content on disk.
+        base (bytes): The common ancestor, the previous rendering.
+        other (bytes): The new rendering.
+    Returns:
+        tuple: The merged content, with conflict markers if any, and
+        whether there were conflicts.
+    """
+    from . import executor
+
+    with tempfile.TemporaryDirectory(prefix='rppc-merge-') as tmp:
+        paths = []
+        for name, content in (('current', current), ('base', base), ('other', other)):
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'wb') as f:
+                f.write(content)
+        result = executor.run(['git', 'merge-file', '-p', '-L', 'yours', '-L', 'previous rppc',
+                               '-L', 'new rppc', *paths], check=False)
+    if result.returncode < 0 or result.returncode > 127:
+        raise executor.CommandError(result.args, result.returncode, result.stdout, result.stderr)
+    return result.stdout, result.returncode > 0
+
+
+def create_lock(spec, package_tree, package_dir=None):
+    """
+    Builds the lock of a freshly generated package.
+
+    The rendering of files changed after being written is stored in the
+    package's git objects, to serve as merge base on update.
+
+    Args:
+        spec (dict): The values the package was rendered from.
+        package_tree (FileTree): The rendered files.
+        package_dir (str): Full path to the package directory, ``None`` when
+            the files are yet to be written as rendered.
+    Returns:
+        dict: The lock.
+    """
+    files = dict()
+    for path, content, _ in package_tree.items():
+        rendered = blob_sha1(content)
+        on_disk = None if package_dir is None else _read(os.path.join(package_dir, path))
+        written = rendered if on_disk is None else blob_sha1(on_disk)
+        if written != rendered:
+            store_blob(package_dir, content)
+        files[path] = {'rendered': rendered, 'written': written}
+    return {'format': LOCK_FORMAT, 'spec': spec, 'files': files}
+
+
+def read_lock(package_dir):
+    """
+    Loads the lock of a package.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+    Returns:
+        dict: The lock.
+    """
+    lock_file = os.path.join(package_dir, LOCK_FILE)
+    try:
+        with open(lock_file) as f:
+            lock = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'{lock_file} not found, was the package created by rppc?') from None
+    if lock.get('format') != LOCK_FORMAT:
+        raise ValueError(f"Unsupported {LOCK_FILE} format {lock.get('format')}")
+    return lock
+
+
+def write_lock(package_dir, lock):
+    """Writes the lock of a package, sorted so that it diffs well."""
+    file_writer(package_dir, LOCK_FILE, json.dumps(lock, indent=2, sort_keys=True) + '\n')
+
+
+def update_files(package_dir, package_tree, lock, merge_changes=False, dry_run=False):
+    """
+    Brings the files of a package up to date with a new rendering.
+
+    Only files whose rendering changed are looked at on disk, everything
+    else, including files rppc did not generate, is left untouched.
+
+    Args:
+        package_dir (str): Full path to the package directory.
+        package_tree (FileTree): The new rendering.
+        lock (dict): The lock of the package.
+        merge_changes (bool): Merge the new rendering into changed files
+            instead of skipping them.
+        dry_run (bool): Only report what would be done.
+    Returns:
+        tuple: Status of each file of the rendering, see ``UPDATE_STATUSES``,
+        and the ``files`` of the new lock.
+    """
+    statuses = dict()
+    files = dict(lock['files'])
+    for path, content, mode in package_tree.items():
+        rendered = blob_sha1(content)
+        entry = files.get(path)
+        if entry is not None and entry['rendered'] == rendered:
+            statuses[path] = 'unchanged'
+            continue
+
+        full_path = os.path.join(package_dir, path)
+        on_disk = _read(full_path)
+        new_content = None
+        if on_disk is None:
+            status = 'skipped' if entry is not None else 'added'
+            new_content = content if entry is None else None
+        elif entry is not None and blob_sha1(on_disk) == entry['written'] == entry['rendered']:
+            status = 'updated'
+            new_content = content
+        elif merge_changes:
+            base = b'' if entry is None else read_blob(package_dir, entry['rendered'])
+            if base is None:
+                status = 'skipped'
+            else:
+                new_content, conflicts = merge(on_disk, base, content)
+                status = 'conflict' if conflicts else 'merged'
+        else:
+            status = 'skipped'
+
+        statuses[path] = status
+        if new_content is None:
+            continue
+        files[path] = {'rendered': rendered, 'written': blob_sha1(new_content)}
+        if dry_run:
+            continue
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(new_content)
+        store_blob(package_dir, content)
+    return statuses, files
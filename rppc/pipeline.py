@@ -0,0 +1,192 @@
+import contextvars
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import profiling
+
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+
+class PipelineError(Exception):
+    """Raised when a step of a :class:`Pipeline` fails."""
+
+    def __init__(self, step, error):
+        super().__init__(f'Step {step} failed: {error!r}')
+        self.step = step
+        self.error = error
+
+
+class Step:
+    """
+    A named unit of work of a :class:`Pipeline`.
+
+    Args:
+        name (str): Unique name of the step.
+        func (callable): Called with each input as a keyword argument.
+        inputs (tuple or dict): Names of the values ``func`` takes, or a
+            mapping of ``func`` argument names to value names.
+        outputs (tuple): Names of the values ``func`` returns. With a single
+            output the return value is stored as is, with several it is
+            unpacked.
+        after (tuple): Names of steps that must finish first, for
+            dependencies on side effects (e.g. files on disk) rather than values.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), after=()):
+        self.name = name
+        self.func = func
+        if isinstance(inputs, dict):
+            self.arguments = dict(inputs)
+        else:
+            self.arguments = {value: value for value in inputs}
+        self.inputs = tuple(self.arguments.values())
+        self.outputs = tuple(outputs)
+        self.after = tuple(after)
+
+    def run(self, context):
+        result = self.func(**{arg: context[name] for arg, name in self.arguments.items()})
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if self.outputs:
+            return dict(zip(self.outputs, result))
+        return {}
+
+    def __repr__(self):
+        return f'Step({self.name!r}, inputs={self.inputs}, outputs={self.outputs}, after={self.after})'
+
+
+class Pipeline:
+    """
+    A graph of :class:`Step` run with as much concurrency as it allows.
+
+    A step depends on the steps producing its inputs and on the steps
+    listed in its ``after``. :meth:`run` starts every step as soon as its
+    dependencies are done, on a pool of threads, so the wall-clock time
+    is that of the longest chain rather than the sum of all steps.
+
+    Args:
+        steps (list): The steps, in a valid sequential order.
+    """
+
+    def __init__(self, steps=()):
+        self.steps = []
+        # Wall-clock seconds of each step of the last run
+        self.timings = dict()
+        for step in steps:
+            self.add(step)
+
+    def add(self, step):
+        """Appends ``step``, returning it."""
+        if any(s.name == step.name for s in self.steps):
+            raise ValueError(f'Duplicate step: {step.name}')
+        self.steps.append(step)
+        return step
+
+    def inputs(self):
+        """set: Names of the values the steps take that no step produces."""
+        outputs = {output for step in self.steps for output in step.outputs}
+        return {name for step in self.steps for name in step.inputs} - outputs
+
+    def dependencies(self, provided=()):
+        """
+        Resolves the dependencies of every step.
+
+        Args:
+            provided (iterable): Names of the values available before any step runs.
+        Returns:
+            dict: Step name to the set of step names it waits for.
+        """
+        producers = dict()
+        names = {step.name for step in self.steps}
+        for step in self.steps:
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(f'{output} is produced by both {producers[output]} and {step.name}')
+                producers[output] = step.name
+
+        deps = dict()
+        for step in self.steps:
+            deps[step.name] = set(step.after)
+            for name in step.after:
+                if name not in names:
+                    raise ValueError(f'{step.name} runs after unknown step {name}')
+            for name in step.inputs:
+                if name in producers:
+                    deps[step.name].add(producers[name])
+                elif name not in provided:
+                    raise ValueError(f'{step.name} needs {name}, which nothing provides')
+
+        # Reject cycles, they would never get scheduled
+        done = set()
+        remaining = dict(deps)
+        while remaining:
+            ready = [name for name, d in remaining.items() if d <= done]
+            if not ready:
+                raise ValueError(f"Dependency cycle between {', '.join(sorted(remaining))}")
+            for name in ready:
+                done.add(name)
+                del remaining[name]
+        return deps
+
+    def _run_step(self, step, context):
+        start = time.perf_counter()
+        try:
+            with profiling.span(step.name, 'step'), profiling.profile(step.name):
+                return step.run(context)
+        finally:
+            self.timings[step.name] = time.perf_counter() - start
+
+    def run(self, context=None, workers=DEFAULT_WORKERS):
+        """
+        Runs the steps.
+
+        Once a step fails no new step is started, the running ones are
+        waited for and the failure is raised as :class:`PipelineError`.
+
+        Args:
+            context (dict): Values available to the steps from the start.
+            workers (int): Maximum number of steps running at once,
+                ``1`` runs the steps sequentially in declaration order, as
+                when the steps are profiled, see :class:`profiling.Tracer`.
+        Returns:
+            dict: ``context`` updated with the outputs of every step.
+        """
+        context = dict(context or {})
+        if profiling.profiles_steps():
+            workers = 1
+        deps = self.dependencies(context)
+        self.timings = dict()
+        done = set()
+        started = set()
+        running = dict()
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rppc-step') as executor:
+            while True:
+                if failure is None:
+                    for step in self.steps:
+                        if len(running) >= workers:
+                            break
+                        if step.name not in started and deps[step.name] <= done:
+                            started.add(step.name)
+                            # Steps see the context variables of the caller, e.g. recordings
+                            running[executor.submit(contextvars.copy_context().run, self._run_step,
+                                                    step, dict(context))] = step
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    try:
+                        context.update(future.result())
+                    except Exception as e:
+                        if failure is None:
+                            failure = PipelineError(step.name, e)
+                            failure.__cause__ = e
+                    else:
+                        done.add(step.name)
+
+        if failure is not None:
+            raise failure
+        return context
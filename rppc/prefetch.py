@@ -0,0 +1,115 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import profiling
+
+
+class Prefetcher:
+    """
+    Runs work in the background as soon as the values it needs are known.
+
+    Tasks are declared with :meth:`add` along with the names of the values
+    they take as arguments. Values are handed over with :meth:`provide`,
+    typically while the user is still answering prompts, and a task is
+    started on a thread pool the moment all of its values are available.
+
+    Example::
+
+        prefetch = Prefetcher()
+        prefetch.add('package_exists', check_package, 'package_name', 'gh_username')
+        prefetch.provide('package_name', 'mypackage')
+        prefetch.provide('gh_username', 'me')  # check_package starts here
+        prefetch.result('package_exists')
+
+    Args:
+        max_workers (int): Maximum number of tasks running at once.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='rppc-prefetch')
+        self._lock = threading.Lock()
+        self._values = dict()
+        self._pending = dict()
+        self._futures = dict()
+
+    def add(self, name, func, *requires):
+        """
+        Declares a task.
+
+        Args:
+            name (str): Name to retrieve the task result with.
+            func (callable): Called with the required values, in order.
+            *requires (str): Names of the values ``func`` takes.
+        Returns:
+            None
+        """
+        with self._lock:
+            self._pending[name] = (func, requires)
+        self._start_ready()
+
+    def provide(self, name, value):
+        """
+        Hands over a value, starting every task that now has all of its values.
+
+        Args:
+            name (str): Name of the value.
+            value: The value.
+        Returns:
+            None
+        """
+        with self._lock:
+            self._values[name] = value
+        self._start_ready()
+
+    def _start_ready(self):
+        with self._lock:
+            ready = [name for name, (_, requires) in self._pending.items()
+                     if all(r in self._values for r in requires)]
+            for name in ready:
+                func, requires = self._pending.pop(name)
+                args = [self._values[r] for r in requires]
+                self._futures[name] = self._executor.submit(contextvars.copy_context().run, self._run,
+                                                            name, func, args)
+
+    @staticmethod
+    def _run(name, func, args):
+        with profiling.span(name, 'prefetch'):
+            return func(*args)
+
+    def started(self, name):
+        """bool: Whether the task ``name`` has been started."""
+        with self._lock:
+            return name in self._futures
+
+    def result(self, name, timeout=None):
+        """
+        Waits for a task and returns its result, re-raising its exception.
+
+        Args:
+            name (str): Name of the task.
+            timeout (float): Seconds to wait, forever by default.
+        Returns:
+            The task result.
+        """
+        with self._lock:
+            if name not in self._futures:
+                if name in self._pending:
+                    missing = [r for r in self._pending[name][1] if r not in self._values]
+                    raise RuntimeError(f"Task {name} is still waiting for {', '.join(missing)}")
+                raise KeyError(f'Unknown task: {name}')
+            future = self._futures[name]
+        return future.result(timeout)
+
+    def shutdown(self, wait=True):
+        """Stops the thread pool, tasks never started are dropped."""
+        with self._lock:
+            self._pending.clear()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(wait=exc_info[0] is None)
@@ -0,0 +1,163 @@
+"""Record a timeline of what a run spends its time on.
+
+Within :func:`tracing`, pipeline steps, external commands, HTTP requests
+and prefetch tasks each record a span: name, category, start, duration,
+thread and attributes, such as the command line or the HTTP status. The
+:class:`Tracer` writes them in the Chrome trace event format, which
+Perfetto (https://ui.perfetto.dev) and ``about:tracing`` display as one
+row per thread.
+
+A tracer can also run :mod:`cProfile` on each pipeline step, and write its
+statistics to ``{step}.pstats``, to be read with :mod:`pstats` or
+snakeviz. Only one profiler can be active at once (and from Python 3.12 a
+second one raises), so the steps then run one at a time.
+
+Spans are only recorded in the context the tracer was installed in, and
+in the threads started from it by pipelines, the executor and prefetchers,
+so concurrent runs in one process do not mix. Without a tracer, spans cost
+a context variable lookup.
+"""
+import contextlib
+import contextvars
+import os
+import threading
+import time
+
+_tracer = contextvars.ContextVar('rppc_tracer', default=None)
+_profile_lock = threading.Lock()
+
+
+class Tracer:
+    """
+    Collects spans, see :func:`tracing`.
+
+    Args:
+        stats_dir (str): Directory to write the cProfile statistics of each
+            pipeline step to, none are collected if None. Pipelines then
+            run their steps one at a time.
+    """
+
+    def __init__(self, stats_dir=None):
+        self.stats_dir = stats_dir
+        self.events = []
+        self._threads = dict()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def _now(self):
+        return (time.perf_counter() - self._start) * 1e6
+
+    @contextlib.contextmanager
+    def span(self, name, category, **attributes):
+        """
+        Records the time spent in the ``with`` block.
+
+        Args:
+            name (str): What is being done.
+            category (str): The kind of span, e.g. ``step`` or ``command``.
+            **attributes: Details shown along with the span.
+        Returns:
+            dict: The attributes, which the block may add to.
+        """
+        thread = threading.current_thread()
+        start = self._now()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes['error'] = repr(e)
+            raise
+        finally:
+            args = {key: value if isinstance(value, (int, float, bool, type(None))) else str(value)
+                    for key, value in attributes.items()}
+            event = {'name': name, 'cat': category, 'ph': 'X', 'ts': round(start, 3),
+                     'dur': round(self._now() - start, 3), 'pid': os.getpid(), 'tid': thread.native_id,
+                     'args': args}
+            with self._lock:
+                self.events.append(event)
+                self._threads[thread.native_id] = thread.name
+
+    @contextlib.contextmanager
+    def profile(self, name):
+        """
+        Runs cProfile on the ``with`` block, if ``stats_dir`` is set.
+
+        Blocks profiled from several threads, e.g. by pipelines running
+        concurrently, wait for each other.
+        """
+        if not self.stats_dir:
+            yield
+            return
+        import cProfile
+
+        with _profile_lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                os.makedirs(self.stats_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.stats_dir, f'{name}.pstats'))
+
+    def trace(self):
+        """dict: The spans in the Chrome trace event format."""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'rppc'}}]
+        metadata.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                         'args': {'name': name}}
+                        for tid, name in sorted(threads.items()))
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        """Writes the trace to ``path``, see :meth:`trace`."""
+        import json
+
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f)
+
+
+@contextlib.contextmanager
+def tracing(tracer):
+    """
+    Records the spans of the ``with`` block in ``tracer``.
+
+    Example::
+
+        tracer = Tracer()
+        with tracing(tracer):
+            create_package(context)
+        tracer.write('trace.json')
+
+    Returns:
+        Tracer: The tracer.
+    """
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+def span(name, category, **attributes):
+    """Records a span with the current tracer, if any, see :meth:`Tracer.span`."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return contextlib.nullcontext(attributes)
+    return tracer.span(name, category, **attributes)
+
+
+def profiles_steps():
+    """bool: Whether the current tracer, if any, profiles pipeline steps."""
+    tracer = _tracer.get()
+    return tracer is not None and bool(tracer.stats_dir)
+
+
+def profile(name):
+    """Profiles the ``with`` block with the current tracer, if any, see :meth:`Tracer.profile`."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.profile(name)
@@ -0,0 +1,353 @@
+"""Generate packages over HTTP, from a long-lived process with warm caches.
+
+``rppc serve`` pays the interpreter startup, the imports and the loading of
+the license corpus, gitignore templates and versioneer once, then answers
+requests holding a package specification as json, in the format of a batch
+spec file entry (see :mod:`rppc.batch`):
+
+* ``POST /archive?format=tar.gz``: responds with the package as a
+  ``tar.gz``, ``tar`` or ``zip`` archive, see :mod:`rppc.archive`.
+* ``POST /packages?git_backend=native``: creates the package, with its
+  repository, in the directory of the server and responds with its
+  ``path`` and the external ``commands`` it ran.
+* ``GET /health``: responds with the number of ``running`` and ``queued``
+  requests.
+
+Requests are generated on a bounded pool of threads. Once every thread is
+busy and ``queue_size`` requests are waiting, new ones are refused at once
+with ``503 Service Unavailable`` and a ``Retry-After`` header, instead of
+piling up. The server listens on localhost, or on a unix socket.
+"""
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8737
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Requests waiting for a worker before new ones are refused
+DEFAULT_QUEUE_SIZE = 2 * DEFAULT_WORKERS
+MAX_REQUEST_SIZE = 1 << 20
+# Connections the kernel accepts before the server does, clients beyond get reset
+LISTEN_BACKLOG = 128
+
+CONTENT_TYPES = {'tar.gz': 'application/gzip', 'tar': 'application/x-tar', 'zip': 'application/zip'}
+
+
+class Busy(Exception):
+    """Raised when a :class:`WorkerPool` has no room left for a job."""
+
+
+class WorkerPool:
+    """
+    Runs jobs on ``workers`` threads, with at most ``queue_size`` jobs waiting.
+
+    Args:
+        workers (int): Number of jobs running at once.
+        queue_size (int): Number of jobs waiting for a thread, beyond which
+            :meth:`submit` raises :class:`Busy`.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rppc-serve')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+    def _run(self, func, args):
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            # Before the result is set, a client may send its next request as soon as it has it
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+            self._slots.release()
+
+    def submit(self, func, *args):
+        """
+        Queues ``func(*args)``.
+
+        Returns:
+            Future: Its result.
+        Raises:
+            Busy: When ``workers`` jobs are running and ``queue_size`` waiting.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise Busy(f'{self.workers} requests running and {self.queue_size} queued')
+        with self._lock:
+            self._pending += 1
+        return self._executor.submit(self._run, func, args)
+
+    def stats(self):
+        """dict: Number of jobs ``running`` and ``queued``, and the limits."""
+        with self._lock:
+            return {'running': self._running, 'queued': self._pending - self._running,
+                    'workers': self.workers, 'queue_size': self.queue_size}
+
+    def shutdown(self):
+        """Waits for the queued jobs, then stops the threads."""
+        self._executor.shutdown(wait=True)
+
+
+def render_archive(spec, archive_format='tar.gz'):
+    """
+    Renders a package into an archive, in memory.
+
+    Args:
+        spec (dict): Package specification, with a ``license``.
+        archive_format (str): ``tar.gz``, ``tar`` or ``zip``.
+    Returns:
+        bytes: The archive.
+    """
+    import io
+
+    from . import archive_pipeline
+    from .archive import ARCHIVE_FORMATS
+    from .batch import spec_context
+
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format {archive_format}, "
+                         f"use one of: {', '.join(ARCHIVE_FORMATS)}")
+    output = io.BytesIO()
+    archive_pipeline().run(dict(spec_context(spec), output=output, archive_format=archive_format),
+                           workers=1)
+    return output.getvalue()
+
+
+def create_package(spec, base_dir, git_backend='native'):
+    """
+    Creates a package, with its repository, in ``base_dir``.
+
+    Args:
+        spec (dict): Package specification, with a ``license``.
+        base_dir (str): Directory to create the package in.
+        git_backend (str): How to create the repository, see :func:`rppc.init_pipeline`.
+    Returns:
+        dict: The ``path`` of the package and the ``commands`` it ran,
+        see :meth:`rppc.executor.Executor.report`.
+    """
+    from . import create_package
+    from .batch import spec_context
+    from .executor import recording, summarize
+
+    with recording() as commands:
+        path = create_package(spec_context(spec), workers=1, git_backend=git_backend, base_dir=base_dir)
+    return {'path': path, 'commands': summarize(commands)['programs']}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Answers the requests of a server made by :func:`make_server`."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # Headers and body are written apart, Nagle would hold the body back
+        # until the client acknowledges the headers, which it delays by 40 ms
+        self.disable_nagle_algorithm = self.request.family in (socket.AF_INET, socket.AF_INET6)
+        super().setup()
+
+    def address_string(self):
+        # Clients of a unix socket have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if content_type == 'application/json':
+            body = (json.dumps(body) + '\n').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'error': message}, headers=headers)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/health':
+            return self._error(404, f'Not found: {self.path}')
+        self._send(200, dict(self.server.pool.stats(), status='ok'))
+
+    def do_POST(self):
+        from .pipeline import PipelineError
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_SIZE:
+            self.close_connection = True
+            return self._error(413, f'Specifications are limited to {MAX_REQUEST_SIZE} bytes')
+        body = self.rfile.read(length)
+
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == '/archive':
+            archive_format = query.get('format', 'tar.gz')
+            job = (render_archive, archive_format)
+        elif url.path == '/packages':
+            job = (create_package, self.server.base_dir,
+                   query.get('git_backend', self.server.git_backend))
+        else:
+            return self._error(404, f'Not found: {self.path}')
+        try:
+            spec = json.loads(body)
+        except ValueError as e:
+            return self._error(400, f'Invalid json: {e}')
+        if not isinstance(spec, dict):
+            return self._error(400, 'The specification must be a json object')
+
+        try:
+            future = self.server.pool.submit(job[0], spec, *job[1:])
+        except Busy as e:
+            return self._error(503, str(e), headers={'Retry-After': '1'})
+        try:
+            result = future.result()
+        except Exception as e:
+            error = e.error if isinstance(e, PipelineError) else e
+            if isinstance(error, FileExistsError):
+                return self._error(409, str(error))
+            if isinstance(error, (KeyError, ValueError, TypeError)):
+                return self._error(400, f'Invalid specification: {error}')
+            self.log_error('%s failed: %r', url.path, error)
+            return self._error(500, f'{type(error).__name__}: {error}')
+
+        if url.path == '/archive':
+            filename = f"{spec['name']}.{archive_format}"
+            self._send(200, result, CONTENT_TYPES[archive_format],
+                       headers={'Content-Disposition': content_disposition(filename)})
+        else:
+            self._send(201, result)
+
+
+def content_disposition(filename):
+    """
+    Builds the ``Content-Disposition`` of a download (RFC 6266).
+
+    Args:
+        filename (str): The name to save the download as.
+    Returns:
+        str: The header, with the name percent-encoded in ``filename*``, and
+        with only safe characters in ``filename``.
+    """
+    fallback = ''.join(char if char.isascii() and (char.isalnum() or char in '._-') else '_'
+                       for char in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """:class:`ThreadingHTTPServer` listening on a unix socket."""
+
+    daemon_threads = True
+    block_on_close = False
+    request_queue_size = LISTEN_BACKLOG
+
+    def server_bind(self):
+        # A socket left by a server that is gone would make bind fail
+        if os.path.exists(self.server_address) and not _listening(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+
+def _listening(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """:class:`http.client.HTTPConnection` to a server listening on a unix socket."""
+
+    def __init__(self, path, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    """:class:`ThreadingHTTPServer` with a listen backlog fit for bursts of clients."""
+
+    block_on_close = False
+    request_queue_size = LISTEN_BACKLOG
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, workers=DEFAULT_WORKERS,
+                queue_size=DEFAULT_QUEUE_SIZE, base_dir=None, git_backend='native', quiet=False):
+    """
+    Creates a server, ready to ``serve_forever``.
+
+    Args:
+        host (str): Address to listen on, localhost by default.
+        port (int): Port to listen on, ``0`` for any free one.
+        unix_socket (str): Path of a unix socket to listen on instead.
+        workers (int): Number of requests generated at once.
+        queue_size (int): Number of requests waiting for a worker before new
+            ones are refused.
+        base_dir (str): Directory packages are created in, the current one
+            by default.
+        git_backend (str): How repositories are created, unless a request
+            asks otherwise, see :func:`rppc.init_pipeline`.
+        quiet (bool): Do not log requests.
+    Returns:
+        socketserver.BaseServer: The server, with its ``pool``.
+    """
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, RequestHandler)
+    else:
+        server = LocalHTTPServer((host, port), RequestHandler)
+    server.pool = WorkerPool(workers, queue_size)
+    server.base_dir = os.path.abspath(base_dir or os.curdir)
+    server.git_backend = git_backend
+    server.quiet = quiet
+    return server
+
+
+def serve(**kwargs):
+    """
+    Warms the caches, then serves requests until interrupted.
+
+    Args:
+        **kwargs: See :func:`make_server`.
+    Returns:
+        None
+    """
+    from .batch import warm_caches
+
+    warm_caches()
+    server = make_server(**kwargs)
+    if kwargs.get('unix_socket'):
+        print(f"Serving on {kwargs['unix_socket']}", flush=True)
+    else:
+        host, port = server.server_address[:2]
+        print(f'Serving on http://{host}:{port}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        if kwargs.get('unix_socket'):
+            os.remove(kwargs['unix_socket'])
@@ -0,0 +1,227 @@
+"""Build a directory next to its final location and move it there at once.
+
+A package is generated in a hidden sibling directory, named
+``.{name}.rppc-staging-{pid}-{random}``, which is renamed to ``{name}``
+only once every step succeeded. Since both live in the same parent
+directory the rename is atomic: ``{name}`` either does not exist or is
+complete. An existing ``{name}`` is never replaced, not even an empty
+directory created by another process meanwhile. On failure, ``Ctrl+C``
+or ``SIGTERM``, the staging directory is removed, and directories left
+behind by a killed process are removed by the next run.
+
+Nothing here looks at or changes the current directory, which is shared by
+every thread of the process.
+"""
+import errno
+import functools
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+
+STAGING_MARKER = '.rppc-staging-'
+# From linux/fcntl.h and linux/fs.h, for renameat2
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+
+def _staging_prefix(name):
+    return f'.{name}{STAGING_MARKER}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clean_stale(base_dir, name):
+    """
+    Removes the staging directories of ``name`` whose process is gone.
+
+    Args:
+        base_dir (str): Directory the package is created in.
+        name (str): Name of the package directory.
+    Returns:
+        list: Full paths of the removed directories.
+    """
+    prefix = _staging_prefix(name)
+    removed = []
+    try:
+        entries = os.listdir(base_dir)
+    except FileNotFoundError:
+        return removed
+    for entry in entries:
+        if not entry.startswith(prefix):
+            continue
+        pid = entry[len(prefix):].split('-', 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            path = os.path.join(base_dir, entry)
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
+
+
+@functools.lru_cache(maxsize=None)
+def _renameat2():
+    if not sys.platform.startswith('linux'):
+        return None
+    import ctypes
+
+    try:
+        func = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        # Before glibc 2.28
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    func.restype = ctypes.c_int
+    return func
+
+
+def rename_noreplace(src, dst):
+    """
+    Renames ``src`` to ``dst`` atomically, unless ``dst`` exists.
+
+    Uses ``renameat2(RENAME_NOREPLACE)`` where the platform and file system
+    support it. Otherwise the name is claimed with an empty directory first,
+    which the rename then replaces.
+
+    Args:
+        src (str): Full path to the directory to rename.
+        dst (str): Full path to rename it to.
+    Returns:
+        None
+    Raises:
+        FileExistsError: If ``dst`` exists.
+    """
+    renameat2 = _renameat2()
+    if renameat2 is not None:
+        import ctypes
+
+        if renameat2(AT_FDCWD, os.fsencode(src), AT_FDCWD, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+        error = ctypes.get_errno()
+        if error == errno.EEXIST:
+            raise FileExistsError(error, os.strerror(error), dst)
+        if error not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(error, os.strerror(error), src, None, dst)
+    os.mkdir(dst)
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        # Only removed if still empty, files another process put there are kept
+        try:
+            os.rmdir(dst)
+        except OSError:
+            pass
+        if e.errno in (errno.ENOTEMPTY, errno.EEXIST):
+            raise FileExistsError(e.errno, os.strerror(e.errno), dst) from None
+        raise
+
+
+class SignalCleanup(Exception):
+    """Raised in the main thread when a termination signal is received."""
+
+    def __init__(self, signum):
+        super().__init__(f'Interrupted by signal {signum}')
+        self.signum = signum
+
+
+class StagingDir:
+    """
+    A staging directory renamed into place with :meth:`publish`.
+
+    Used as a context manager: the directory is created on enter, and
+    removed on exit unless it was published. ``SIGTERM`` is turned into
+    :class:`SignalCleanup` while in the context, when entered from the
+    main thread, so that it unwinds like ``Ctrl+C`` does instead of
+    killing the process on the spot.
+
+    Example::
+
+        with StagingDir(base_dir, 'mypackage') as staging:
+            build(staging.path)
+            staging.publish()
+
+    Args:
+        base_dir (str): Directory the final directory is created in.
+        name (str): Name of the final directory.
+    """
+
+    def __init__(self, base_dir, name):
+        self.base_dir = base_dir
+        self.name = name
+        self.target = os.path.join(base_dir, name)
+        self.path = None
+        self.published = False
+        self._handlers = dict()
+
+    def _raise_signal(self, signum, frame):
+        raise SignalCleanup(signum)
+
+    def create(self):
+        """
+        Creates the staging directory, after removing stale ones.
+
+        Returns:
+            str: Full path to the staging directory.
+        """
+        if os.path.lexists(self.target):
+            raise FileExistsError(f'{self.target} already exists')
+        clean_stale(self.base_dir, self.name)
+        prefix = f'{_staging_prefix(self.name)}{os.getpid()}-'
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=self.base_dir)
+        os.chmod(self.path, 0o755)
+        return self.path
+
+    def publish(self):
+        """
+        Renames the staging directory to its final name.
+
+        Returns:
+            str: Full path to the final directory.
+        Raises:
+            FileExistsError: If the final directory exists, even empty.
+        """
+        try:
+            rename_noreplace(self.path, self.target)
+        except FileExistsError:
+            raise FileExistsError(f'{self.target} already exists') from None
+        self.published = True
+        return self.target
+
+    def cleanup(self):
+        """Removes the staging directory, unless it was published."""
+        if self.path is None or self.published:
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        if threading.current_thread() is threading.main_thread():
+            self._handlers[signal.SIGTERM] = signal.signal(signal.SIGTERM, self._raise_signal)
+        try:
+            self.create()
+        except BaseException:
+            self._restore_handlers()
+            raise
+        return self
+
+    def _restore_handlers(self):
+        for signum, handler in self._handlers.items():
+            signal.signal(signum, handler)
+        self._handlers.clear()
+
+    def __exit__(self, *exc_info):
+        try:
+            self.cleanup()
+        finally:
+            self._restore_handlers()
+
+    def __repr__(self):
+        return f'StagingDir({self.path!r} -> {self.target!r})'
@@ -0,0 +1,192 @@
+import os
+import posixpath
+import threading
+
+DEFAULT_FILE_MODE = 0o644
+DEFAULT_DIR_MODE = 0o755
+
+
+class TreeDir:
+    """
+    A directory of a :class:`FileTree`.
+
+    It can be handed to :func:`rppc.utils.file_writer` and
+    :func:`rppc.utils.folder_creator` in place of a path on disk,
+    so every ``create_*`` step can render into the tree unchanged.
+
+    Args:
+        tree (FileTree): The tree the directory belongs to.
+        path (str): Posix path of the directory relative to the tree root,
+            ``''`` for the root itself.
+    """
+
+    def __init__(self, tree, path=''):
+        self.tree = tree
+        self.path = path
+
+    def _join(self, name):
+        if self.path:
+            return posixpath.normpath(posixpath.join(self.path, name))
+        return posixpath.normpath(name)
+
+    def mkdir(self, name):
+        """Adds the sub-directory ``name``, returning it."""
+        path = self._join(name)
+        self.tree.add_dir(path)
+        return TreeDir(self.tree, path)
+
+    def write(self, name, content, mode=DEFAULT_FILE_MODE):
+        """Adds, or replaces, the file ``name``."""
+        self.tree.add_file(self._join(name), content, mode)
+
+    def append(self, name, content):
+        """Appends to the file ``name``, creating it if needed."""
+        self.tree.append_file(self._join(name), content)
+
+    def __fspath__(self):
+        raise TypeError(f'{self!r} is not on disk yet, flush its FileTree first')
+
+    def __repr__(self):
+        return f'TreeDir({self.path!r})'
+
+
+class FileTree(TreeDir):
+    """
+    In-memory tree of files, mapping posix paths to content and mode.
+
+    Steps render into the tree without touching the disk, and the result
+    can then be inspected (dry run), compared with a directory, written out
+    in one pass with :meth:`flush`, or serialized elsewhere without
+    rendering again. The tree is also its own root :class:`TreeDir`.
+    """
+
+    def __init__(self):
+        super().__init__(self, '')
+        self._files = dict()
+        self._dirs = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check(path):
+        if path.startswith('/') or path == '..' or path.startswith('../'):
+            raise ValueError(f'{path} is outside of the tree')
+
+    def add_dir(self, path):
+        """Adds the directory ``path`` and its parents."""
+        self._check(path)
+        with self._lock:
+            while path and path != '.':
+                self._dirs.add(path)
+                path = posixpath.dirname(path)
+
+    def add_file(self, path, content, mode=DEFAULT_FILE_MODE):
+        """
+        Adds, or replaces, the file ``path``.
+
+        Args:
+            path (str): Posix path relative to the tree root.
+            content (str or bytes): File content, text is encoded as utf-8.
+            mode (int): Permission bits of the file.
+        Returns:
+            None
+        """
+        self._check(path)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        parent = posixpath.dirname(path)
+        if parent:
+            self.add_dir(parent)
+        with self._lock:
+            self._files[path] = (content, mode)
+
+    def append_file(self, path, content):
+        """Appends ``content`` to the file ``path``, creating it if needed."""
+        self._check(path)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        parent = posixpath.dirname(path)
+        if parent:
+            self.add_dir(parent)
+        with self._lock:
+            current, mode = self._files.get(path, (b'', DEFAULT_FILE_MODE))
+            self._files[path] = (current + content, mode)
+
+    def read(self, path):
+        """bytes: Content of the file ``path``."""
+        return self._files[path][0]
+
+    def mode(self, path):
+        """int: Permission bits of the file ``path``."""
+        return self._files[path][1]
+
+    @property
+    def dirs(self):
+        """list: Every directory, sorted so parents come first."""
+        return sorted(self._dirs)
+
+    @property
+    def size(self):
+        """int: Total size of the files in bytes."""
+        return sum(len(content) for content, _ in self._files.values())
+
+    def items(self):
+        """Iterates over ``(path, content, mode)`` of every file, sorted by path."""
+        for path in sorted(self._files):
+            content, mode = self._files[path]
+            yield path, content, mode
+
+    def flush(self, base_dir):
+        """
+        Writes the tree under ``base_dir``, creating it if needed.
+
+        Directories are created once each, parents first, then every file
+        is written with a single ``write``.
+
+        Args:
+            base_dir (str): Full path to the directory to write into.
+        Returns:
+            str: ``base_dir``.
+        """
+        os.makedirs(base_dir, exist_ok=True)
+        for path in self.dirs:
+            try:
+                os.mkdir(os.path.join(base_dir, path), DEFAULT_DIR_MODE)
+            except FileExistsError:
+                pass
+        for path, content, mode in self.items():
+            fd = os.open(os.path.join(base_dir, path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+        return base_dir
+
+    def diff(self, base_dir):
+        """
+        Compares the tree with what is on disk under ``base_dir``.
+
+        Args:
+            base_dir (str): Full path to the directory to compare with.
+        Returns:
+            dict: ``added``, ``changed`` and ``unchanged`` lists of paths.
+        """
+        result = {'added': [], 'changed': [], 'unchanged': []}
+        for path, content, _ in self.items():
+            try:
+                with open(os.path.join(base_dir, path), 'rb') as f:
+                    on_disk = f.read()
+            except FileNotFoundError:
+                result['added'].append(path)
+                continue
+            result['unchanged' if on_disk == content else 'changed'].append(path)
+        return result
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def __iter__(self):
+        return iter(sorted(self._files))
+
+    def __len__(self):
+        return len(self._files)
+
+    def __repr__(self):
+        return f'<FileTree {len(self)} files, {self.size} bytes>'
@@ -1,18 +1,46 @@
+import json
 import os
-import requests
-import subprocess
 import warnings
 
+from .tree import TreeDir
 
-GITHUB_API_URL = 'https://api.github.com'
+
+# Overridable to point rppc at a GitHub Enterprise instance or a local stand-in
+GITHUB_API_URL = os.environ.get('RPPC_GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_GRAPHQL_URL = os.environ.get('RPPC_GITHUB_GRAPHQL_URL', f'{GITHUB_API_URL}/graphql')
+# Repositories looked up per GraphQL query, keeps each query well under
+# GitHub's node and cost limits
+GRAPHQL_CHUNK_SIZE = 50
+
+
+def user_cache_dir():
+    """Location of rppc's on-disk caches, ``$RPPC_CACHE_DIR`` overrides it"""
+    cache_dir = os.environ.get('RPPC_CACHE_DIR')
+    if not cache_dir:
+        xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join('~', '.cache')
+        cache_dir = os.path.join(xdg_cache, 'rppc')
+    return os.path.abspath(os.path.expanduser(cache_dir))
 
 
 def file_writer(folder, filename, content):
+    if isinstance(folder, TreeDir):
+        folder.write(filename, content)
+        return
     with open(os.path.join(folder, filename), 'w') as f:
         f.write(content)
 
 
+def file_appender(folder, filename, content):
+    if isinstance(folder, TreeDir):
+        folder.append(filename, content)
+        return
+    with open(os.path.join(folder, filename), 'a') as f:
+        f.write(content)
+
+
 def folder_creator(base_dir, folder_name):
+    if isinstance(base_dir, TreeDir):
+        return base_dir.mkdir(folder_name)
     new_folder = os.path.join(base_dir, folder_name)
     if not os.path.exists(new_folder):
         os.mkdir(new_folder)
@@ -20,55 +48,165 @@ def folder_creator(base_dir, folder_name):
     return new_folder
 
 
-def check_user(github_username):
+def check_user(github_username, github_auth=None):
     """Checks how many public repos user have"""
+    from . import http_client
+
     users_url = '/'.join([GITHUB_API_URL, 'users', github_username])
-    req = requests.get(users_url)
+    req = http_client.get(users_url, **_auth_kwargs(github_auth))
     if req.status_code == 200:
         user_public_repo = req.json()['public_repos']
         # How many pages to crawl through 100 per page
         return int(user_public_repo / 100) + 1
     else:
-        return Exception(req.text)
+        raise Exception(req.text)
+
 
+def request_repos(*args, github_auth=None):
+    from . import http_client
 
-def request_repos(*args):
     page, github_username, package_name, url = args
-    req = requests.get(url, params={
+    req = http_client.get(url, params={
         'per_page': 100,
         'page': page
-    })
+    }, **_auth_kwargs(github_auth))
     if req.status_code == 200:
-        filtered_repo = list(filter(lambda x: x['full_name'] == f'{github_username}/{package_name}', req.json()))
+        full_name = f'{github_username}/{package_name}'.lower()
+        filtered_repo = list(filter(lambda x: x['full_name'].lower() == full_name, req.json()))
         if len(filtered_repo) > 0:
             return True
         return False
     else:
-        return Exception(req.text)
+        raise Exception(req.text)
 
 
-def check_repos(max_page, *args):
+def check_repos(max_page, *args, github_auth=None):
     start_page = 0
     while start_page < max_page:
         start_page += 1
-        if request_repos(start_page, *args):
+        if request_repos(start_page, *args, github_auth=github_auth):
             yield True
 
 
-def check_package(package_name, github_username):
-    url = '/'.join([GITHUB_API_URL, 'users', github_username, 'repos'])
-    pages = check_user(github_username)
-    rep = check_repos(pages, github_username, package_name, url)
-    for r in rep:
-        if r:
-            warnings.warn(f'{package_name} exists on {github_username} Github account!')
-            return r
+def _auth_kwargs(github_auth):
+    if github_auth is None:
+        token = os.environ.get('GITHUB_TOKEN')
+        if token:
+            return {'headers': {'Authorization': f'bearer {token}'}}
+        return {}
+    return {'auth': github_auth.get('auth'), 'headers': github_auth.get('headers')}
 
 
-def create_repo(package_name, package_description, github_auth):
+def lookup_repo(package_name, github_username, github_auth=None):
+    """
+    Looks up ``github_username/package_name`` with a single request.
+
+    ``github_username`` may be a user or an organization. When
+    authenticated, private repositories the user can see are found too.
+    A renamed or transferred repository answers with a redirect, its old
+    name is free to be reused, so it does not count as existing.
+
+    Returns:
+        bool: Whether the repository exists, ``None`` when GitHub
+        could not tell (rate limited, server error).
+    """
+    from . import http_client
+
+    repo_url = '/'.join([GITHUB_API_URL, 'repos', github_username, package_name])
+    req = http_client.get(repo_url, allow_redirects=False, **_auth_kwargs(github_auth))
+    if req.status_code == 200:
+        return True
+    if req.status_code in (301, 302, 307, 308):
+        warnings.warn(f'{github_username}/{package_name} was renamed or moved to '
+                      f'{req.headers.get("Location")}')
+        return False
+    if req.status_code == 404:
+        return False
+    return None
+
+
+def check_package(package_name, github_username, github_auth=None):
+    exists = lookup_repo(package_name, github_username, github_auth)
+    if exists is None:
+        # Fall back to crawling every repo of the account
+        url = '/'.join([GITHUB_API_URL, 'users', github_username, 'repos'])
+        pages = check_user(github_username, github_auth)
+        rep = check_repos(pages, github_username, package_name, url, github_auth=github_auth)
+        exists = any(rep)
+    if exists:
+        warnings.warn(f'{package_name} exists on {github_username} Github account!')
+        return True
+    return False
+
+
+def repositories_query(full_names):
+    """
+    Builds a GraphQL query looking up several repositories at once.
+
+    Args:
+        full_names (list): Repositories as ``owner/name``.
+    Returns:
+        dict: The GraphQL request payload, repository ``i`` is aliased ``r{i}``.
+    """
+    params = []
+    fields = []
+    variables = dict()
+    for i, full_name in enumerate(full_names):
+        owner, name = full_name.split('/', 1)
+        params.append(f'$o{i}: String!, $n{i}: String!')
+        fields.append(f'  r{i}: repository(owner: $o{i}, name: $n{i}) {{ nameWithOwner }}')
+        variables[f'o{i}'] = owner
+        variables[f'n{i}'] = name
+    query = '\n'.join([f"query({', '.join(params)}) {{"] + fields + ['}'])
+    return {'query': query, 'variables': variables}
+
+
+def check_packages(full_names, github_auth=None, chunk_size=GRAPHQL_CHUNK_SIZE):
+    """
+    Checks which of many repositories exist, with one GraphQL request per chunk.
+
+    The GraphQL API requires authentication, either ``github_auth``
+    or a token in ``$GITHUB_TOKEN``.
+
+    Args:
+        full_names (list): Repositories as ``owner/name``.
+        github_auth (dict): Github login object.
+        chunk_size (int): Number of repositories per request.
+    Returns:
+        dict: ``owner/name`` to whether the repository exists.
+    """
+    from . import http_client
+
+    for full_name in full_names:
+        if full_name.count('/') != 1:
+            raise ValueError(f'Expected owner/name, got: {full_name}')
+
+    full_names = list(dict.fromkeys(full_names))
+    exists = dict()
+    for start in range(0, len(full_names), chunk_size):
+        chunk = full_names[start:start + chunk_size]
+        req = http_client.post(GITHUB_GRAPHQL_URL, json=repositories_query(chunk),
+                               **_auth_kwargs(github_auth))
+        if req.status_code != 200:
+            raise Exception(req.text)
+        result = req.json()
+        # Missing repositories come back as null along with NOT_FOUND errors
+        errors = [e for e in result.get('errors') or [] if e.get('type') != 'NOT_FOUND']
+        data = result.get('data')
+        if errors or data is None:
+            raise Exception(json.dumps(errors or result))
+        for i, full_name in enumerate(chunk):
+            exists[full_name] = data.get(f'r{i}') is not None
+    return exists
+
+
+def create_repo(package_name, package_description, github_auth, package_exists=None):
+    from . import http_client
+
     try:
         github_username = github_auth['auth'].username
-        package_exists = check_package(package_name, github_username)
+        if package_exists is None:
+            package_exists = check_package(package_name, github_username, github_auth)
         if not package_exists:
             payload = {
                 'name': package_name,
@@ -80,11 +218,12 @@ def create_repo(package_name, package_description, github_auth):
                 'has_wiki': True,
             }
             post_url = '/'.join([GITHUB_API_URL, 'user', 'repos'])
-            req = requests.post(post_url, json=payload, auth=github_auth['auth'], headers=github_auth['headers'])
+            req = http_client.post(post_url, json=payload, auth=github_auth['auth'],
+                                   headers=github_auth['headers'])
             if req.status_code in [201, 200]:
                 return req.json()['clone_url']
             else:
-                return Exception(req.text)
+                raise Exception(req.text)
     except Exception as e:
         print(e)
 
@@ -93,6 +232,8 @@ def make_command(command_list):
     return ' '.join(command_list)
 
 
-def run_shell_command(command_list):
-    cmd = make_command(command_list)
-    subprocess.run(cmd, shell=True)
+def run_shell_command(command_list, cwd=None):
+    """Runs a command without a shell, see :func:`rppc.executor.run`"""
+    from . import executor
+
+    return executor.run(command_list, cwd=cwd)
@@ -0,0 +1,68 @@
+"""Install versioneer into a package without running ``versioneer install``.
+
+rppc bundles a copy of the vendored ``versioneer.py`` and writes the files
+``versioneer install`` creates from it: ``versioneer.py`` itself, the
+package's ``_version.py``, the ``__init__.py`` stanza reading the version
+and the ``.gitattributes`` entry for ``git archive``. It also adds them to
+``MANIFEST.in``, so that source distributions can compute their version.
+"""
+import functools
+import importlib.util
+import os
+
+BUNDLED_VERSIONEER = os.path.join(os.path.dirname(__file__), 'data', 'versioneer.py')
+
+# Must match the [versioneer] section of ``templates.setup_cfg_template``
+VERSIONEER_STYLE = 'pep440'
+VERSIONEER_TAG_PREFIX = 'v'
+
+
+@functools.lru_cache(maxsize=None)
+def versioneer_source():
+    """bytes: Content of the bundled ``versioneer.py``."""
+    with open(BUNDLED_VERSIONEER, 'rb') as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def load_versioneer():
+    """Imports the bundled ``versioneer.py``, once."""
+    spec = importlib.util.spec_from_file_location('rppc._bundled_versioneer', BUNDLED_VERSIONEER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bundled_version():
+    """str: Version of the bundled versioneer."""
+    for line in versioneer_source().decode('utf-8').splitlines()[:5]:
+        if line.startswith('# Version: '):
+            return line[len('# Version: '):].strip()
+    return 'unknown'
+
+
+def version_py(package_name):
+    """str: The ``_version.py`` of a package, as ``versioneer install`` writes it."""
+    versioneer = load_versioneer()
+    return versioneer.LONG_VERSION_PY['git'] % {
+        'DOLLAR': '$',
+        'STYLE': VERSIONEER_STYLE,
+        'TAG_PREFIX': VERSIONEER_TAG_PREFIX,
+        'PARENTDIR_PREFIX': f'{package_name}-',
+        'VERSIONFILE_SOURCE': f'{package_name}/_version.py',
+    }
+
+
+def init_py_snippet():
+    """str: The stanza ``versioneer install`` appends to the package ``__init__.py``."""
+    return load_versioneer().INIT_PY_SNIPPET.format('_version')
+
+
+def gitattributes(package_name):
+    """str: The ``.gitattributes`` marking ``_version.py`` for keyword substitution."""
+    return f'{package_name}/_version.py export-subst\n'
+
+
+def manifest_entries(package_name):
+    """str: The ``MANIFEST.in`` lines including versioneer's files in source distributions."""
+    return f'include versioneer.py\ninclude {package_name}/_version.py\n'
@@ -2,7 +2,7 @@
 import os
 from codecs import open
 
-from setuptools import find_packages, setup
+from setuptools import Command, find_packages, setup
 
 import versioneer
 
@@ -16,10 +16,49 @@ install_requires = [t.strip() for t in requirements]
 with open(os.path.join(here, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
 
+
+def write_frozen_version(target):
+    # Load rppc/_version_cache.py by path, importing rppc itself
+    # would require the runtime dependencies at build time
+    from importlib.util import module_from_spec, spec_from_file_location
+    spec = spec_from_file_location('_version_cache', os.path.join(here, 'rppc', '_version_cache.py'))
+    version_cache = module_from_spec(spec)
+    spec.loader.exec_module(version_cache)
+    version_cache.write_frozen_version(target, versioneer.get_versions())
+    print(f'froze version into {target}')
+
+
+class freeze_version(Command):
+    description = 'freeze the version into rppc/_frozen_version.py'
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        write_frozen_version(os.path.join(here, 'rppc', '_frozen_version.py'))
+
+
+cmdclass = versioneer.get_cmdclass()
+cmdclass['freeze_version'] = freeze_version
+_build_py = cmdclass['build_py']
+
+
+class build_py(_build_py):
+    def run(self):
+        _build_py.run(self)
+        write_frozen_version(os.path.join(self.build_lib, 'rppc', '_frozen_version.py'))
+
+
+cmdclass['build_py'] = build_py
+
 setup(
     name='rppc',
     version=versioneer.get_version(),
-    cmdclass=versioneer.get_cmdclass(),
+    cmdclass=cmdclass,
     description='Reproducible Python Package Creator',
     long_description=long_description,
     long_description_content_type='text/markdown',
@@ -28,14 +67,16 @@ setup(
     author_email='landungs@uw.edu',
     maintainer=['Landung Setiawan', 'Adrian Prananda'],
     maintainer_email='landungs@uw.edu',
-    python_requires='>=3',
+    python_requires='>=3.9',
     license='MIT',
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Build Tools',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
     keywords=[],
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every request with the ``respond`` function of its server."""
+
+    protocol_version = 'HTTP/1.1'
+    # Answers are written in two parts, headers then body
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        status, data, headers = self.server.respond(self, self.rfile.read(length) if length else b'')
+        body = data if isinstance(data, bytes) or data is None else json.dumps(data).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status not in (204, 304):
+            self.send_header('Content-Length', str(len(body or b'')))
+        self.end_headers()
+        if body and status not in (204, 304):
+            self.wfile.write(body)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serving(respond):
+    """
+    Serves HTTP from ``127.0.0.1`` on a free port, in a thread.
+
+    Args:
+        respond (callable): Called with the request handler, whose ``command``,
+            ``path`` and ``headers`` describe the request, and the request body.
+            Returns ``(status, data, headers)``, ``data`` being bytes, ``None``
+            or what to answer as json.
+    Returns:
+        str: The url of the server, without a trailing ``/``.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.respond = respond
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Starts stub servers for the test, see :func:`serving`."""
+    with contextlib.ExitStack() as stack:
+        yield lambda respond: stack.enter_context(serving(respond))
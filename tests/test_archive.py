@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+import rppc
+from rppc import archive
+from rppc.tree import FileTree
+
+SPEC = {
+    'package_name': 'pkg', 'gh_username': 'someone', 'github_username': 'someone',
+    'package_description': 'A package', 'author_name': 'First Last',
+    'author_email': 'first@example.com', 'dependencies': 'numpy',
+    'gitignore': ['Python'], 'license': 'MIT', 'year': 2020,
+}
+
+
+class Pipe(io.RawIOBase):
+    """A file object that can only be written to, like a pipe."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data.extend(data)
+        return len(data)
+
+
+def render_archive(archive_format):
+    output = io.BytesIO()
+    rppc.archive_pipeline().run(dict(SPEC, output=output, archive_format=archive_format))
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('archive_format', archive.ARCHIVE_FORMATS)
+def test_archives_are_reproducible(archive_format):
+    assert render_archive(archive_format) == render_archive(archive_format)
+
+
+def test_tar_holds_the_package():
+    package_tree = rppc.render_pipeline().run(SPEC)['package_tree']
+    rppc.lock_package(package_tree, **{name: SPEC[name] for name in rppc.render_pipeline().inputs()})
+    with tarfile.open(fileobj=io.BytesIO(render_archive('tar.gz'))) as tar:
+        members = tar.getmembers()
+        files = {member.name: tar.extractfile(member).read() for member in members if member.isfile()}
+    assert [member.name for member in members] == sorted(member.name for member in members)
+    assert members[0].name == 'pkg' and members[0].isdir()
+    assert files == {f'pkg/{path}': content for path, content, _ in package_tree.items()}
+    assert {(member.mtime, member.uid, member.uname) for member in members} == {(archive.ARCHIVE_MTIME, 0, '')}
+
+
+def test_zip_does_not_depend_on_seeking():
+    tree = FileTree()
+    tree.add_file('pkg/__init__.py', '')
+    tree.add_file('run.sh', '#!/bin/sh\n', 0o775)
+    seekable = io.BytesIO()
+    pipe = Pipe()
+    archive.write_zip(tree, seekable)
+    archive.write_zip(tree, pipe)
+    assert bytes(pipe.data) == seekable.getvalue()
+
+    with zipfile.ZipFile(seekable) as zf:
+        assert zf.namelist() == ['pkg/', 'pkg/__init__.py', 'run.sh']
+        assert zf.getinfo('run.sh').external_attr >> 16 == 0o100755
+        assert zf.read('run.sh') == b'#!/bin/sh\n'
+
+
+def test_archive_format():
+    assert archive.archive_format('pkg.ZIP') == 'zip'
+    assert archive.archive_format('pkg.tgz') == 'tar.gz'
+    assert archive.archive_format('-') == 'tar.gz'
+    with pytest.raises(ValueError):
+        archive.write_archive(FileTree(), io.BytesIO(), 'rar')
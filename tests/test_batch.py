@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+import pytest
+
+from rppc import cli
+from rppc.batch import generate_package, load_specs, run_batch
+
+SPECS = """
+packages:
+  - name: lab01
+    description: First lab
+    author:
+      name: John Smith
+      email: jsmith@example.com
+    dependencies:
+      - numpy
+    license: MIT
+  - name: lab02
+    description: Second lab
+    author:
+      name: John Smith
+      email: jsmith@example.com
+    dependencies: []
+"""
+
+
+def test_load_specs():
+    specs = load_specs(io.StringIO(SPECS))
+    assert [spec['name'] for spec in specs] == ['lab01', 'lab02']
+    with pytest.raises(ValueError):
+        load_specs(io.StringIO('name: lab01'))
+
+
+def test_generate_package_reports_failures():
+    specs = load_specs(io.StringIO(SPECS))
+    report = generate_package(specs[1])
+    assert report['status'] == 'failed'
+    assert 'has no license' in report['error']
+
+    report = generate_package(dict(specs[0], license='NOPE'))
+    assert report['status'] == 'failed'
+    assert 'Unknown license NOPE' in report['error']
+
+    for name in ('../lab01', 'lab 01', 'lab01\n', 'lab"01', '-lab01', 1):
+        report = generate_package(dict(specs[0], name=name))
+        assert report['status'] == 'failed'
+        assert 'Invalid package name' in report['error']
+
+
+def test_run_batch(tmp_path):
+    specs = load_specs(io.StringIO(SPECS))
+    specs[1]['license'] = 'BSD-3-Clause'
+    report_file = str(tmp_path / 'report.json')
+    reports = run_batch(specs, parallel=2, report_file=report_file, git_backend='native',
+                        base_dir=str(tmp_path))
+
+    for name, license_name in (('lab01', 'MIT License'), ('lab02', 'BSD 3-Clause License')):
+        package_dir = tmp_path / name
+        assert (package_dir / name / '__init__.py').exists()
+        assert (package_dir / '.git' / 'HEAD').exists()
+        assert (package_dir / 'LICENSE').read_text().startswith(license_name)
+    with open(report_file) as f:
+        report = json.load(f)
+    assert report['summary']['packages'] == 2 and report['summary']['failed'] == 0
+    assert report['packages'] == reports
+    assert [(r['name'], r['status'], r['path']) for r in reports] == [
+        ('lab01', 'ok', str(tmp_path / 'lab01')), ('lab02', 'ok', str(tmp_path / 'lab02'))]
+
+
+def test_batch_rejects_single_package_options(tmp_path, capsys):
+    spec_file = tmp_path / 'specs.yml'
+    spec_file.write_text(SPECS)
+    for option in (['--github'], ['--dry-run'], ['-o', 'pkg.zip'], ['--profile', 'trace.json']):
+        with pytest.raises(SystemExit) as exit_info:
+            cli.parse_args(['init', '--batch', str(spec_file), *option])
+        assert exit_info.value.code == 2
+        assert f'--batch cannot be combined with {option[0].replace("-o", "--output")}' in \
+            capsys.readouterr().err
+    assert cli.parse_args(['init', '--batch', str(spec_file), '-j', '2']).jobs == 2
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+
+import pytest
+
+from rppc import cli, utils
+
+EXISTING = {'jsuser/one', 'uw-org/three'}
+
+
+@pytest.fixture
+def graphql_server(stub_server, monkeypatch):
+    """Local stand-in for GitHub's GraphQL ``repository`` lookups"""
+    queries = []
+
+    def respond(request, body):
+        payload = json.loads(body)
+        queries.append(payload)
+        variables = payload['variables']
+        data = dict()
+        errors = []
+        for alias, owner, name in re.findall(r'(r\d+): repository\(owner: \$(o\d+), name: \$(n\d+)\)',
+                                             payload['query']):
+            full_name = f'{variables[owner]}/{variables[name]}'
+            if full_name in EXISTING:
+                data[alias] = {'nameWithOwner': full_name}
+            else:
+                data[alias] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [alias]})
+        return 200, {'data': data, 'errors': errors}, {}
+
+    monkeypatch.setattr(utils, 'GITHUB_GRAPHQL_URL', f'{stub_server(respond)}/graphql')
+    yield queries
+
+
+def test_check_packages_chunks_queries(graphql_server):
+    names = ['jsuser/one', 'jsuser/two', 'uw-org/three', 'uw-org/four', 'jsuser/five']
+    exists = utils.check_packages(names, chunk_size=2)
+    assert exists == {
+        'jsuser/one': True,
+        'jsuser/two': False,
+        'uw-org/three': True,
+        'uw-org/four': False,
+        'jsuser/five': False,
+    }
+    assert len(graphql_server) == 3
+
+
+def test_check_packages_rejects_bare_names():
+    with pytest.raises(ValueError):
+        utils.check_packages(['one'])
+
+
+def test_check_command_reports_errors(stub_server, monkeypatch, capsys):
+    url = stub_server(lambda request, body: (401, {'message': 'Bad credentials'}, {}))
+    monkeypatch.setattr(utils, 'GITHUB_GRAPHQL_URL', f'{url}/graphql')
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    with pytest.raises(SystemExit) as exit_info:
+        cli.run(['check', 'jsuser/one'])
+    assert exit_info.value.code == 'Cannot check the repositories: {"message": "Bad credentials"}'
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+
+import pytest
+
+import rppc
+from rppc.batch import generate_package, run_batch
+
+PACKAGES = 8
+
+
+def make_specs():
+    return [{'name': f'lab{i:02d}', 'description': f'Lab {i}',
+             'author': {'name': 'John Smith', 'email': 'jsmith@example.com'},
+             'dependencies': ['numpy'], 'license': 'MIT'} for i in range(PACKAGES)]
+
+
+def read_package(package_dir):
+    files = dict()
+    for root, dirs, names in os.walk(package_dir):
+        if root == package_dir:
+            dirs.remove('.git')
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, package_dir)] = (f.read(), os.stat(path).st_mode)
+    tree = subprocess.run(['git', 'rev-parse', 'HEAD^{tree}'], cwd=package_dir,
+                          stdout=subprocess.PIPE, check=True).stdout
+    return files, tree
+
+
+@pytest.mark.parametrize('git_backend', ['cli', 'native'])
+def test_threads_match_sequential(tmp_path, monkeypatch, git_backend):
+    for variable in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{variable}_NAME', 'John Smith')
+        monkeypatch.setenv(f'GIT_{variable}_EMAIL', 'jsmith@example.com')
+    cwd = os.getcwd()
+    sequential = tmp_path / 'sequential'
+    threaded = tmp_path / 'threaded'
+    sequential.mkdir()
+    threaded.mkdir()
+
+    for spec in make_specs():
+        assert generate_package(spec, git_backend=git_backend, base_dir=str(sequential))['status'] == 'ok'
+    reports = run_batch(make_specs(), parallel=PACKAGES, workers=rppc.DEFAULT_WORKERS,
+                        git_backend=git_backend, threads=True, base_dir=str(threaded))
+
+    assert [report['status'] for report in reports] == ['ok'] * PACKAGES
+    assert os.getcwd() == cwd
+    assert sorted(os.listdir(threaded)) == sorted(os.listdir(sequential))
+    for report in reports:
+        assert report['path'] == str(threaded / report['name'])
+        assert read_package(report['path']) == read_package(str(sequential / report['name']))
+        # Each report only counts the commands of its own package
+        if git_backend == 'cli':
+            assert report['commands']['git commit']['count'] == 1
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import rppc
+from rppc import daemon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(rppc.__file__)))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('RPPC_CACHE_DIR', str(tmp_path))
+    yield tmp_path
+    try:
+        daemon.request({'command': 'stop'})
+    except daemon.DaemonError:
+        pass
+
+
+def rppc_cli(*args, use_daemon, input=None):
+    env = dict(os.environ, PYTHONPATH=ROOT, RPPC_DAEMON='1' if use_daemon else '0')
+    return subprocess.run([sys.executable, '-m', 'rppc.cli', *args], cwd=ROOT, env=env, input=input,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def test_commands_run_in_the_daemon(cache_dir):
+    for args, input in ((['licenses', 'list'], None),
+                        (['update', str(cache_dir / 'missing')], None),
+                        (['init', '-n', '-f', 'tests/package.yml'], '10\n')):
+        local = rppc_cli(*args, use_daemon=False, input=input)
+        forwarded = rppc_cli(*args, use_daemon=True, input=input)
+        assert forwarded.returncode == local.returncode
+        assert forwarded.stdout.splitlines()[:-1] == local.stdout.splitlines()[:-1]
+        assert forwarded.stderr.splitlines()[-1:] == local.stderr.splitlines()[-1:]
+
+    status = daemon.request({'command': 'status'})
+    assert status['served'] == 3
+    assert os.stat(cache_dir / 'daemon.sock').st_mode & 0o077 == 0
+
+
+def test_idle_daemon_exits(cache_dir):
+    daemon.start(idle_timeout=0.5).close()
+    path = cache_dir / 'daemon.sock'
+    deadline = time.monotonic() + 10
+    while path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not path.exists()
+    with pytest.raises(daemon.DaemonError):
+        daemon.request({'command': 'status'})
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+
+import pytest
+
+from rppc.executor import CommandError, Executor
+
+
+def test_run_without_shell(tmp_path):
+    executor = Executor()
+    result = executor.run([sys.executable, '-c', 'import os, sys; print(os.getcwd(), sys.argv[1:])',
+                           '"quoted arg"', '$HOME'], cwd=str(tmp_path))
+    assert result.stdout.decode().strip() == f"""{tmp_path} ['"quoted arg"', '$HOME']"""
+    assert result.returncode == 0
+    assert result.wall > 0
+    if sys.platform != 'win32':
+        assert result.user is not None and result.max_rss > 0
+
+
+def test_env_and_input():
+    result = Executor(env={'RPPC_A': '1'}).run(
+        [sys.executable, '-c',
+         'import os, sys; print(os.environ["RPPC_A"], os.environ["RPPC_B"], sys.stdin.read())'],
+        env={'RPPC_B': '2'}, input=b'in')
+    assert result.stdout == b'1 2 in\n'
+
+
+def test_failure_raises():
+    executor = Executor()
+    with pytest.raises(CommandError) as error:
+        executor.run([sys.executable, '-c', 'import sys; sys.exit("broken")'])
+    assert error.value.returncode == 1
+    assert 'broken' in str(error.value)
+    assert executor.run([sys.executable, '-c', 'raise SystemExit(3)'], check=False).returncode == 3
+
+
+def test_large_output_and_status():
+    data = b'x' * (1 << 20)
+    result = Executor().run([sys.executable, '-c', 'import sys; data = sys.stdin.buffer.read(); '
+                             'sys.stdout.buffer.write(data); sys.stderr.buffer.write(data[:10])'],
+                            input=data)
+    assert result.stdout == data and result.stderr == data[:10]
+    if sys.platform != 'win32':
+        killed = Executor().run([sys.executable, '-c',
+                                 'import os, signal; os.kill(os.getpid(), signal.SIGTERM)'], check=False)
+        assert killed.returncode == -15 and killed.user is not None
+
+
+def test_timeout_kills():
+    start = time.perf_counter()
+    with pytest.raises(CommandError) as error:
+        Executor().run([sys.executable, '-c', 'import time; time.sleep(30)'], timeout=0.5)
+    assert error.value.timed_out
+    assert time.perf_counter() - start < 10
+
+
+def test_concurrency_limit_and_report():
+    executor = Executor(max_concurrency=2)
+    sleep = [sys.executable, '-c', 'import time; time.sleep(0.3)']
+    start = time.perf_counter()
+    results = executor.run_many([sleep] * 4)
+    elapsed = time.perf_counter() - start
+    assert len(results) == 4
+    assert 0.6 <= elapsed < 2.5
+
+    programs = executor.report()['programs']
+    assert programs[sys.executable.rsplit('/', 1)[-1]]['count'] == 4
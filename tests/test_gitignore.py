@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from rppc import gitignore
+
+
+def test_compose_deduplicates_rules():
+    text = gitignore.compose(['Python', 'Jupyter', 'Editors', 'Linux'])
+    rules = [line for line in text.splitlines() if line and not line.startswith('#')]
+    assert len(rules) == len(set(rules))
+    assert '.ipynb_checkpoints' in rules
+    assert '### Jupyter ###' in text
+
+
+def test_user_templates_take_precedence(tmp_path, monkeypatch):
+    monkeypatch.setenv('RPPC_CACHE_DIR', str(tmp_path))
+    (tmp_path / 'gitignore').mkdir()
+    (tmp_path / 'gitignore' / 'Python.gitignore').write_text('# Custom\n*.pyc\n')
+    (tmp_path / 'gitignore' / 'Data.gitignore').write_text('*.csv\n')
+
+    assert 'Data' in gitignore.available_templates()
+    assert gitignore.compose(['Python', 'Data']) == '### Python ###\n# Custom\n*.pyc\n\n### Data ###\n*.csv\n'
+    with pytest.raises(KeyError):
+        gitignore.load_template('Nope')
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import subprocess
+
+import pytest
+
+import rppc
+from rppc import gitrepo
+from rppc.batch import spec_context
+from rppc.tree import FileTree
+
+
+def git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, stdout=subprocess.PIPE, check=True).stdout.decode()
+
+
+def make_tree():
+    tree = FileTree()
+    tree.add_file('README.md', '# pkg\n')
+    tree.add_file('pkg/__init__.py', '')
+    tree.add_file('tests/__init__.py', '')
+    tree.add_file('run me.sh', '#!/bin/sh\n', 0o755)
+    return tree
+
+
+def test_fast_import_matches_git_add(tmp_path, monkeypatch):
+    monkeypatch.delenv('GIT_AUTHOR_NAME', raising=False)
+    monkeypatch.delenv('GIT_AUTHOR_EMAIL', raising=False)
+    monkeypatch.setenv('GIT_COMMITTER_NAME', 'Committer')
+    monkeypatch.setenv('GIT_COMMITTER_EMAIL', 'committer@example.com')
+    tree = make_tree()
+    imported = tmp_path / 'imported'
+    tree.flush(str(imported))
+    gitrepo.init_repository(str(imported))
+    author, committer = gitrepo.identity('First Last', 'first@example.com')
+    gitrepo.fast_import(str(imported), gitrepo.fast_import_stream(tree, author=author, committer=committer))
+
+    added = tmp_path / 'added'
+    tree.flush(str(added))
+    git(added, 'init', '-q')
+    git(added, 'add', '.')
+
+    assert git(imported, 'rev-parse', 'HEAD^{tree}') == git(added, 'write-tree')
+    assert git(imported, 'log', '--format=%an <%ae>|%cn|%B') == \
+        f'First Last <first@example.com>|Committer|{gitrepo.COMMIT_MESSAGE}\n\n'
+    assert git(imported, 'status', '--porcelain') == ''
+    git(imported, 'fsck', '--strict')
+    assert len(list((imported / '.git' / 'objects' / 'pack').glob('*.pack'))) == 1
+
+
+def test_bundle(tmp_path):
+    tree = make_tree()
+    package_dir = tmp_path / 'pkg'
+    tree.flush(str(package_dir))
+    gitrepo.init_repository(str(package_dir))
+    gitrepo.fast_import(str(package_dir), gitrepo.fast_import_stream(tree, author=('A', 'a@example.com')))
+
+    bundle = gitrepo.create_bundle(str(package_dir), str(tmp_path / 'pkg.bundle'))
+    git(tmp_path, 'clone', '-q', bundle, 'clone')
+    assert (tmp_path / 'clone' / 'run me.sh').read_text() == '#!/bin/sh\n'
+
+
+def test_write_commit_without_git(tmp_path, monkeypatch):
+    tree = make_tree()
+    tree.add_file('pkg/sub/module.py', 'x = 1\n')
+    tree.add_file('pkg-data.txt', 'sorted before pkg/\n')
+    package_dir = tmp_path / 'pkg'
+    tree.flush(str(package_dir))
+    with monkeypatch.context() as m:
+        m.setattr(subprocess, 'run', None)
+        m.setattr(subprocess, 'Popen', None)
+        gitrepo.init_repository(str(package_dir))
+        commit = gitrepo.write_commit(str(package_dir), tree, author=('First Last', 'first@example.com'),
+                                      when=1600000000)
+
+    added = tmp_path / 'added'
+    tree.flush(str(added))
+    git(added, 'init', '-q')
+    git(added, 'add', '.')
+
+    git(package_dir, 'fsck', '--strict', '--full')
+    assert git(package_dir, 'rev-parse', 'HEAD') == commit + '\n'
+    assert git(package_dir, 'rev-parse', 'HEAD^{tree}') == git(added, 'write-tree')
+    assert git(package_dir, 'log', '--format=%an <%ae> %at %s') == \
+        f'First Last <first@example.com> 1600000000 {gitrepo.COMMIT_MESSAGE}\n'
+    assert git(package_dir, 'status', '--porcelain') == ''
+    assert git(package_dir, 'ls-files', '--stage', 'run me.sh').startswith('100755 ')
+
+
+@pytest.mark.parametrize('git_backend', rppc.GIT_BACKENDS)
+def test_branch_ignores_user_default(tmp_path, monkeypatch, git_backend):
+    config = tmp_path / 'gitconfig'
+    config.write_text('[init]\n\tdefaultBranch = main\n')
+    monkeypatch.setenv('GIT_CONFIG_GLOBAL', str(config))
+    for role in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{role}_NAME', 'First Last')
+        monkeypatch.setenv(f'GIT_{role}_EMAIL', 'first@example.com')
+    spec = {'name': 'pkg', 'description': 'A package',
+            'author': {'name': 'First Last', 'email': 'first@example.com'},
+            'dependencies': [], 'license': 'MIT'}
+    bundle = str(tmp_path / 'pkg.bundle')
+    package_dir = rppc.create_package(dict(spec_context(spec), bundle_file=bundle), workers=1,
+                                      git_backend=git_backend, base_dir=str(tmp_path))
+
+    assert git(package_dir, 'symbolic-ref', 'HEAD').strip() == f'refs/heads/{gitrepo.DEFAULT_BRANCH}'
+    git(tmp_path, 'clone', '-q', bundle, 'clone')
+    assert git(tmp_path / 'clone', 'branch', '--show-current').strip() == gitrepo.DEFAULT_BRANCH
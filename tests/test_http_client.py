@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from rppc import http_client
+
+
+@pytest.fixture
+def flaky_server(stub_server):
+    statuses = [503, 503, 200]
+    seen = []
+
+    def respond(request, body):
+        seen.append(request.client_address[1])
+        return statuses.pop(0) if statuses else 200, b'ok', {}
+
+    yield f'{stub_server(respond)}/', seen
+
+
+@pytest.fixture
+def fast_backoff():
+    http_client.configure(backoff_factor=0)
+    yield
+    http_client.configure(backoff_factor=http_client.DEFAULT_BACKOFF_FACTOR)
+
+
+def test_retries_and_reuses_connection(flaky_server, fast_backoff):
+    url, seen = flaky_server
+    assert http_client.get(url).status_code == 200
+    assert http_client.get(url).status_code == 200
+    assert len(seen) == 4
+    # Every request went through the same keep-alive connection
+    assert len(set(seen)) == 1
+
+
+def test_session_is_shared_and_has_timeouts():
+    session = http_client.get_session()
+    assert session is http_client.get_session()
+    assert session.timeout == http_client.DEFAULT_TIMEOUT
+    with pytest.raises(TypeError):
+        http_client.configure(nope=1)
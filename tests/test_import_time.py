@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+import rppc
+
+# Budgets, in milliseconds, for the imports triggered by rppc itself
+# (interpreter startup is not counted). Generous on purpose, the heavy
+# dependencies alone add several hundred milliseconds.
+IMPORT_RPPC_BUDGET_MS = 150
+CLI_HELP_BUDGET_MS = 150
+
+# Modules that must only be imported by the step that needs them
+DEFERRED_MODULES = ['requests', 'yaml', 'munch', 'doctr']
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(rppc.__file__)))
+
+
+def importtime(*args):
+    """Runs python with ``-X importtime``, returns top-level ``{module: cumulative_us}``"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *args],
+                          cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+    modules = dict()
+    all_modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        all_modules.add(name.strip())
+        # Nested imports are indented, their time is already in the parent's total
+        if not name.startswith('  '):
+            modules[name.strip()] = int(cumulative_us)
+    return modules, all_modules
+
+
+def rppc_import_ms(*args):
+    baseline, _ = importtime('-c', 'pass')
+    modules, all_modules = importtime(*args)
+    total_us = sum(us for name, us in modules.items() if name not in baseline)
+    return total_us / 1000, all_modules
+
+
+def assert_no_heavy_imports(all_modules):
+    for module in DEFERRED_MODULES:
+        assert module not in all_modules, f'{module} should not be imported eagerly'
+
+
+def test_import_rppc_budget():
+    # Warm up bytecode and version caches
+    importtime('-c', 'import rppc')
+    elapsed_ms, all_modules = rppc_import_ms('-c', 'import rppc')
+    assert_no_heavy_imports(all_modules)
+    assert elapsed_ms < IMPORT_RPPC_BUDGET_MS
+
+
+def test_cli_help_budget():
+    importtime('-m', 'rppc.cli', '--help')
+    elapsed_ms, all_modules = rppc_import_ms('-m', 'rppc.cli', '--help')
+    assert_no_heavy_imports(all_modules)
+    assert elapsed_ms < CLI_HELP_BUDGET_MS
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import functools
+
+import pytest
+
+import rppc
+from rppc import cli, licenses
+from rppc.licenses import LicenseCatalog, cached_get_json, parse_placeholders, render_license
+
+MIT_BODY = 'MIT License\n\nCopyright (c) [year] [fullname]\n\nPermission is hereby granted...\n'
+
+
+@pytest.fixture
+def license_server(stub_server):
+    hits = []
+
+    def respond(request, body):
+        hits.append((request.path, request.headers.get('If-None-Match')))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return 304, None, {}
+        if request.path == '/licenses':
+            data = [{'key': 'mit', 'name': 'MIT License', 'spdx_id': 'MIT', 'url': f'{url}/mit'}]
+        else:
+            data = {'key': 'mit', 'name': 'MIT License', 'spdx_id': 'MIT', 'body': MIT_BODY}
+        return 200, data, {'ETag': '"v1"'}
+
+    url = f'{stub_server(respond)}/licenses'
+    yield url, hits
+
+
+def test_bundled_catalog_is_indexed(tmp_path):
+    catalog = LicenseCatalog(cache_dir=str(tmp_path))
+    assert catalog['MIT']['key'] == 'mit'
+    assert catalog['bsd-3-clause'] is catalog['BSD-3-Clause']
+    assert catalog[catalog.licenses.index(catalog['GPL-3.0'])]['spdx_id'] == 'GPL-3.0'
+    assert 'not-a-license' not in catalog
+
+
+def test_render_license_fills_placeholders():
+    body = 'Copyright (c) [year], [fullname] and [fullname]'
+    lic = {'body': body, 'placeholders': parse_placeholders(body)}
+    assert lic['placeholders'][0] == [14, 20, 'year']
+    assert render_license(lic, year=2020, fullname='Jane') == 'Copyright (c) 2020, Jane and Jane'
+    assert render_license(lic, year=2020) == 'Copyright (c) 2020, [fullname] and [fullname]'
+
+
+def test_cached_get_json_revalidates_with_etag(license_server, tmp_path):
+    url, hits = license_server
+    cache_file = str(tmp_path / 'index.json')
+    cached_get_json(url, cache_file)
+    # Fresh cache, no request at all
+    cached_get_json(url, cache_file)
+    assert hits == [('/licenses', None)]
+
+    # Expired cache, revalidated with the stored etag
+    data = cached_get_json(url, cache_file, ttl=0)
+    assert data[0]['spdx_id'] == 'MIT'
+    assert hits == [('/licenses', None), ('/licenses', '"v1"')]
+
+
+def test_refresh_replaces_bundled_corpus(license_server, tmp_path):
+    url, hits = license_server
+    catalog = LicenseCatalog(cache_dir=str(tmp_path))
+    assert len(catalog) > 1
+
+    catalog.refresh(url=url)
+    assert len(catalog) == 1
+    text = catalog.render('MIT', year=2020, fullname='Jane Doe')
+    assert text.startswith('MIT License\n\nCopyright (c) 2020 Jane Doe\n')
+    assert len(LicenseCatalog(cache_dir=str(tmp_path))) == 1
+
+
+def test_refresh_command_reports_the_written_corpus(license_server, tmp_path, monkeypatch, capsys):
+    url, hits = license_server
+    build_corpus = licenses.build_corpus
+    monkeypatch.setattr(licenses, 'build_corpus',
+                        lambda *args: dict(build_corpus(*args), version='2099.01.01'))
+    catalog = LicenseCatalog(cache_dir=str(tmp_path))
+    monkeypatch.setattr(catalog, 'refresh', functools.partial(catalog.refresh, url))
+    monkeypatch.setattr(rppc, 'LICENSES', catalog)
+    output = str(tmp_path / 'corpus.json')
+
+    cli.run(['licenses', 'refresh', '-o', output])
+    assert capsys.readouterr().out == f'License corpus 2099.01.01 written to {output}\n'
+    # The corpus in use did not change
+    assert catalog.version != '2099.01.01'
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import subprocess
+
+import pytest
+
+import rppc
+from rppc import lockfile
+
+SPEC = {
+    'package_name': 'pkg', 'gh_username': 'someone', 'github_username': 'someone',
+    'package_description': 'A package', 'author_name': 'First Last',
+    'author_email': 'first@example.com', 'dependencies': 'numpy,pandas,scipy',
+    'gitignore': ['Python'], 'license': 'MIT', 'year': 2020,
+}
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    for name in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{name}_NAME', 'First Last')
+        monkeypatch.setenv(f'GIT_{name}_EMAIL', 'first@example.com')
+    package_tree = rppc.render_pipeline().run(SPEC)['package_tree']
+    rppc.lock_package(package_tree, **SPEC)
+    package_tree.flush(str(tmp_path))
+    for command in (['init', '-q'], ['add', '.'], ['commit', '-q', '-m', 'Initial']):
+        subprocess.run(['git', *command], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+def test_blob_sha1_matches_git(tmp_path):
+    (tmp_path / 'f').write_bytes(b'content\n')
+    expected = subprocess.run(['git', 'hash-object', str(tmp_path / 'f')],
+                              stdout=subprocess.PIPE, check=True).stdout.decode().strip()
+    assert lockfile.blob_sha1('content\n') == expected
+
+
+def test_nothing_to_update(package):
+    before = (package / '.rppc-lock').read_text()
+    statuses = rppc.update(str(package))
+    assert set(statuses.values()) == {'unchanged'}
+    assert (package / '.rppc-lock').read_text() == before
+
+
+def test_template_change(package, monkeypatch):
+    monkeypatch.setattr(rppc, 'flake8_template', lambda name: f'[flake8]\n# {name}\n')
+    monkeypatch.setattr(rppc, 'travis_template', lambda name: f'# {name}\n')
+    (package / '.travis.yml').write_text('language: python\n# my edit\n')
+
+    statuses = rppc.update(str(package))
+    assert statuses['.flake8'] == 'updated'
+    assert statuses['.travis.yml'] == 'skipped'
+    assert (package / '.flake8').read_text() == '[flake8]\n# pkg\n'
+    assert (package / '.travis.yml').read_text() == 'language: python\n# my edit\n'
+    # Skipped files are retried on the next update
+    assert rppc.update(str(package))['.travis.yml'] == 'skipped'
+
+
+def test_merge_edited_file(package):
+    requirements = package / 'requirements.txt'
+    requirements.write_text(requirements.read_text().replace('numpy', 'numpy>=1.20'))
+    spec_file = package / 'spec.yml'
+    spec_file.write_text('name: pkg\ndescription: A package\nauthor:\n  name: First Last\n'
+                         '  email: first@example.com\ndependencies:\n  - numpy\n  - pandas\n  - scipy\n  - xarray\n')
+
+    with open(spec_file) as f:
+        statuses = rppc.update(str(package), info_file=f, merge=True)
+    assert statuses['requirements.txt'] == 'merged'
+    assert requirements.read_text().split() == ['numpy>=1.20', 'pandas', 'scipy', 'xarray']
+    assert set(statuses.values()) == {'unchanged', 'merged'}
+    assert lockfile.read_lock(str(package))['spec']['dependencies'] == 'numpy,pandas,scipy,xarray'
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+import rppc
+from rppc.pipeline import Pipeline, PipelineError, Step
+
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    def wait_for_sibling(name):
+        barrier.wait()
+        order.append(name)
+        return name
+
+    pipeline = Pipeline([
+        Step('a', lambda: wait_for_sibling('a'), outputs=('a',)),
+        Step('b', lambda: wait_for_sibling('b'), outputs=('b',)),
+        Step('join', lambda a, b: order.append('join') or a + b, inputs=('a', 'b'), outputs=('ab',)),
+    ])
+    context = pipeline.run(workers=2)
+    assert context['ab'] == 'ab'
+    assert order[-1] == 'join'
+
+
+def test_failure_stops_scheduling():
+    ran = []
+    pipeline = Pipeline([
+        Step('boom', lambda: 1 / 0),
+        Step('later', lambda: ran.append('later'), after=('boom',)),
+    ])
+    with pytest.raises(PipelineError) as e:
+        pipeline.run(workers=1)
+    assert e.value.step == 'boom'
+    assert ran == []
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match='cycle'):
+        Pipeline([
+            Step('a', lambda b: b, inputs=('b',), outputs=('a',)),
+            Step('b', lambda a: a, inputs=('a',), outputs=('b',)),
+        ]).run()
+    with pytest.raises(ValueError, match='nothing provides'):
+        Pipeline([Step('a', lambda x: x, inputs=('x',))]).run()
+
+
+def _ancestors(deps, name):
+    found = set()
+    pending = list(deps[name])
+    while pending:
+        dep = pending.pop()
+        if dep not in found:
+            found.add(dep)
+            pending.extend(deps[dep])
+    return found
+
+
+@pytest.mark.parametrize('git_backend', rppc.GIT_BACKENDS)
+def test_init_pipeline_commits_last(git_backend):
+    pipeline = rppc.init_pipeline(git_backend)
+    deps = pipeline.dependencies([
+        'package_name', 'package_description', 'author_name', 'author_email', 'dependencies',
+        'license', 'gitignore', 'year', 'github_username', 'gh_auth', 'git_url', 'bundle_file', 'staging'
+    ])
+    others = {step.name for step in pipeline.steps} - {'commit', 'bundle', 'publish', 'push'}
+    assert _ancestors(deps, 'commit') == others
+    assert _ancestors(deps, 'push') == others | {'commit', 'bundle', 'publish'}
+    assert deps['create_readme'] == {'create_package_tree'}
+    assert deps['lock'] == {step.name for step in rppc.render_pipeline().steps}
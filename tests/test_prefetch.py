@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+import rppc
+from rppc import utils
+from rppc.prefetch import Prefetcher
+
+SPEC = """\
+name: pkg
+description: A package
+author: {name: First Last, email: first@example.com}
+dependencies: [numpy]
+github-id: jsuser
+license: MIT
+"""
+
+
+def test_task_starts_once_its_values_are_known():
+    started = threading.Event()
+
+    def check(name, owner):
+        started.set()
+        return f'{owner}/{name}'
+
+    with Prefetcher() as prefetch:
+        prefetch.add('full_name', check, 'package_name', 'gh_username')
+        prefetch.provide('package_name', 'mypackage')
+        assert not prefetch.started('full_name')
+        with pytest.raises(RuntimeError, match='gh_username'):
+            prefetch.result('full_name')
+
+        prefetch.provide('gh_username', 'me')
+        assert started.wait(5)
+        assert prefetch.result('full_name') == 'me/mypackage'
+
+
+def test_task_errors_are_raised_on_result():
+    with Prefetcher() as prefetch:
+        prefetch.add('boom', lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            prefetch.result('boom')
+        with pytest.raises(KeyError):
+            prefetch.result('unknown')
+
+
+def test_init_uses_the_prefetched_check(stub_server, monkeypatch):
+    import requests
+    from doctr import local
+
+    checks = []
+
+    def check_package(package_name, github_username, github_auth=None):
+        checks.append((package_name, github_username))
+        return False
+
+    created = []
+
+    def respond(request, body):
+        created.append(request.path)
+        return 201, {'clone_url': 'https://github.com/jsuser/pkg.git'}, {}
+
+    contexts = []
+    monkeypatch.setattr(rppc, 'check_package', check_package)
+    monkeypatch.setattr(utils, 'check_package', check_package)
+    monkeypatch.setattr(utils, 'GITHUB_API_URL', stub_server(respond))
+    monkeypatch.setattr(local, 'GitHub_login', lambda: {
+        'auth': requests.auth.HTTPBasicAuth('jsuser', 'token'), 'headers': {}})
+    monkeypatch.setattr(rppc, 'create_package', lambda context, **kwargs: contexts.append(context))
+    rppc.init(SPEC, init_github=True)
+
+    # The repository is created without checking for it again after the prompts
+    assert checks == [('pkg', 'jsuser')]
+    assert created == ['/user/repos']
+    assert contexts[0]['git_url'] == 'https://github.com/jsuser/pkg.git'
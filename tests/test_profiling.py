@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import contextvars
+import json
+import os
+import pstats
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rppc import executor, profiling
+from rppc.pipeline import Pipeline, Step
+
+
+def make_pipeline():
+    return Pipeline([
+        Step('render', lambda: 'rendered', outputs=('text',)),
+        Step('run', lambda text: executor.run([sys.executable, '-c', 'pass']), inputs=('text',)),
+    ])
+
+
+def test_spans_of_steps_and_commands(tmp_path):
+    tracer = profiling.Tracer()
+    with profiling.tracing(tracer), profiling.span('run pipeline', 'test', answer=42):
+        make_pipeline().run(workers=2)
+    tracer.write(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as f:
+        events = json.load(f)['traceEvents']
+
+    spans = {event['name']: event for event in events if event['ph'] == 'X'}
+    python = os.path.basename(sys.executable)
+    assert sorted(spans) == sorted([python, 'render', 'run', 'run pipeline'])
+    assert spans['run pipeline']['args'] == {'answer': 42}
+    assert spans[python]['cat'] == 'command' and spans[python]['args']['returncode'] == 0
+    # The command runs within its step, on the same thread
+    step, command = spans['run'], spans[python]
+    assert step['tid'] == command['tid']
+    assert step['ts'] <= command['ts'] and command['ts'] + command['dur'] <= step['ts'] + step['dur']
+    threads = {event['tid'] for event in events if event['name'] == 'thread_name'}
+    assert {span['tid'] for span in spans.values()} <= threads
+
+
+def test_nothing_recorded_without_tracer():
+    tracer = profiling.Tracer()
+    with profiling.span('alone', 'test') as attributes:
+        attributes['ignored'] = True
+    make_pipeline().run()
+    assert tracer.events == []
+
+
+def test_step_statistics(tmp_path):
+    with profiling.tracing(profiling.Tracer(str(tmp_path))):
+        make_pipeline().run()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['render.pstats', 'run.pstats']
+    assert pstats.Stats(str(tmp_path / 'run.pstats')).total_calls > 0
+
+
+def test_statistics_of_concurrent_steps(tmp_path):
+    pipeline = Pipeline([
+        Step('first', lambda: time.sleep(0.05) or 'first', outputs=('first',)),
+        Step('second', lambda: time.sleep(0.05) or 'second', outputs=('second',)),
+    ])
+    tracer = profiling.Tracer(str(tmp_path))
+    with profiling.tracing(tracer):
+        assert pipeline.run(workers=2) == {'first': 'first', 'second': 'second'}
+        # Pipelines running at once in the same process wait for each other
+        with ThreadPoolExecutor(2) as pool:
+            runs = [pool.submit(contextvars.copy_context().run, make_pipeline().run, workers=2)
+                    for _ in range(2)]
+            assert all(run.result()['text'] == 'rendered' for run in runs)
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+        ['first.pstats', 'render.pstats', 'run.pstats', 'second.pstats']
+    first, second = sorted((event for event in tracer.events if event['name'] in ('first', 'second')),
+                           key=lambda event: event['ts'])
+    assert first['ts'] + first['dur'] <= second['ts']
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from rppc import gitignore, server
+
+SPEC = {'name': 'pkg', 'description': 'A package',
+        'author': {'name': 'First Last', 'email': 'first@example.com'},
+        'dependencies': ['numpy'], 'license': 'MIT'}
+
+
+@pytest.fixture
+def running_server(tmp_path):
+    httpd = server.make_server(port=0, workers=1, queue_size=0, base_dir=str(tmp_path), quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    httpd.pool.shutdown()
+
+
+def post(httpd, path, body):
+    connection = http.client.HTTPConnection(*httpd.server_address[:2])
+    connection.request('POST', path, json.dumps(body) if not isinstance(body, str) else body)
+    response = connection.getresponse()
+    return response.status, response.getheader('Content-Type'), response.read()
+
+
+def test_archive(running_server):
+    status, content_type, body = post(running_server, '/archive?format=zip', SPEC)
+    assert (status, content_type) == (200, 'application/zip')
+    assert body == server.render_archive(SPEC, 'zip')
+
+
+def test_create_package(running_server, tmp_path):
+    status, _, body = post(running_server, '/packages', SPEC)
+    assert status == 201
+    assert json.loads(body)['path'] == str(tmp_path / 'pkg')
+    assert (tmp_path / 'pkg' / '.git' / 'HEAD').exists()
+    assert post(running_server, '/packages', SPEC)[0] == 409
+
+
+def test_errors(running_server):
+    assert post(running_server, '/archive', '{')[0] == 400
+    assert post(running_server, '/archive', dict(SPEC, license=None))[0] == 400
+    assert post(running_server, '/archive', dict(SPEC, name='../pkg'))[0] == 400
+    assert post(running_server, '/archive', dict(SPEC, name='a\r\nX-Injected: yes'))[0] == 400
+    assert post(running_server, '/packages', dict(SPEC, name='a"b'))[0] == 400
+    assert post(running_server, '/archive?format=rar', SPEC)[0] == 400
+    assert post(running_server, '/archive', dict(SPEC, gitignore='Python'))[0] == 400
+    assert post(running_server, '/nowhere', SPEC)[0] == 404
+
+
+def test_content_disposition():
+    assert server.content_disposition('pkg.tar.gz') == \
+        "attachment; filename=\"pkg.tar.gz\"; filename*=UTF-8''pkg.tar.gz"
+    assert server.content_disposition('a\r\n"é.zip') == \
+        "attachment; filename=\"a____.zip\"; filename*=UTF-8''a%0D%0A%22%C3%A9.zip"
+
+
+def test_pool_refuses_beyond_its_queue():
+    pool = server.WorkerPool(workers=1, queue_size=1)
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    queued = pool.submit(lambda: 'queued')
+    with pytest.raises(server.Busy):
+        pool.submit(lambda: 'refused')
+    assert pool.stats()['running'] + pool.stats()['queued'] == 2
+    release.set()
+    assert running.result() and queued.result() == 'queued'
+    assert pool.submit(lambda: 'accepted').result() == 'accepted'
+    pool.shutdown()
+
+
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / 'rppc.sock')
+    httpd = server.make_server(unix_socket=path, workers=1, quiet=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        connection = server.UnixHTTPConnection(path, timeout=10)
+        connection.request('GET', '/health')
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())['status'] == 'ok'
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        httpd.pool.shutdown()
+
+
+def test_gitignore_names_stay_in_the_templates(running_server, tmp_path):
+    secret = tmp_path / 'secret.gitignore'
+    secret.write_text('secret\n')
+    name = os.path.relpath(str(tmp_path / 'secret'), gitignore.BUNDLED_TEMPLATES)
+    for names in ([name], [str(tmp_path / 'secret')], ['Python', 'Nope']):
+        status, _, body = post(running_server, '/archive', dict(SPEC, gitignore=names))
+        assert status == 400
+        assert 'Unknown gitignore template' in json.loads(body)['error']
+    with pytest.raises(KeyError):
+        gitignore.load_template(name)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import ast
+
+from rppc import create_sphinx_docs
+from rppc.tree import FileTree
+
+
+def test_sphinx_docs_rendered_in_tree():
+    tree = FileTree()
+    create_sphinx_docs(tree, 'pkg', 'A package', "Jane O'Hara", year=2020)
+
+    assert list(tree) == ['docs/Makefile', 'docs/source/_static/.gitkeep',
+                          'docs/source/_templates/.gitkeep', 'docs/source/conf.py',
+                          'docs/source/index.rst']
+    assert 'docs/build' in tree.dirs
+    conf = {}
+    exec(compile(ast.parse(tree.read('docs/source/conf.py')), 'conf.py', 'exec'), conf)
+    assert conf['copyright'] == "2020, Jane O'Hara"
+    assert conf['extensions'] == ['sphinx.ext.autodoc', 'sphinx.ext.viewcode',
+                                  'sphinx.ext.napoleon', 'nbsphinx']
+    assert b'\t@$(SPHINXBUILD) -M help' in tree.read('docs/Makefile')
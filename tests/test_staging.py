@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from rppc import staging as staging_module
+from rppc.staging import SignalCleanup, StagingDir, clean_stale
+
+
+def test_publish_renames_into_place(tmp_path):
+    with StagingDir(str(tmp_path), 'pkg') as staging:
+        assert os.path.basename(staging.path).startswith(f'.pkg.rppc-staging-{os.getpid()}-')
+        (tmp_path / os.path.basename(staging.path) / 'setup.py').write_text('')
+        assert not (tmp_path / 'pkg').exists()
+        staging.publish()
+    assert os.listdir(tmp_path) == ['pkg']
+    assert (tmp_path / 'pkg' / 'setup.py').exists()
+
+
+def test_failure_leaves_nothing(tmp_path):
+    cwd = os.getcwd()
+    with pytest.raises(RuntimeError):
+        with StagingDir(str(tmp_path), 'pkg') as staging:
+            (tmp_path / os.path.basename(staging.path) / 'setup.py').write_text('')
+            raise RuntimeError('step failed')
+    assert os.listdir(tmp_path) == []
+    assert os.getcwd() == cwd
+
+
+def test_existing_target_is_refused(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    with pytest.raises(FileExistsError):
+        with StagingDir(str(tmp_path), 'pkg'):
+            pass
+    assert os.listdir(tmp_path) == ['pkg']
+
+
+@pytest.mark.parametrize('renameat2', [True, False])
+def test_target_created_meanwhile_is_kept(tmp_path, monkeypatch, renameat2):
+    if not renameat2:
+        monkeypatch.setattr(staging_module, '_renameat2', lambda: None)
+    with StagingDir(str(tmp_path), 'pkg') as staging:
+        (tmp_path / os.path.basename(staging.path) / 'setup.py').write_text('')
+        # Another process creating the package in between
+        (tmp_path / 'pkg').mkdir()
+        with pytest.raises(FileExistsError):
+            staging.publish()
+    assert os.listdir(tmp_path) == ['pkg']
+    assert os.listdir(tmp_path / 'pkg') == []
+
+
+def test_clean_stale(tmp_path):
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    (tmp_path / f'.pkg.rppc-staging-{dead.pid}-abcd').mkdir()
+    (tmp_path / f'.pkg.rppc-staging-{os.getppid()}-abcd').mkdir()
+    (tmp_path / f'.other.rppc-staging-{dead.pid}-abcd').mkdir()
+
+    removed = clean_stale(str(tmp_path), 'pkg')
+    assert [os.path.basename(path) for path in removed] == [f'.pkg.rppc-staging-{dead.pid}-abcd']
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_sigterm_cleans_up(tmp_path):
+    with pytest.raises(SignalCleanup):
+        with StagingDir(str(tmp_path), 'pkg'):
+            os.kill(os.getpid(), signal.SIGTERM)
+    assert os.listdir(tmp_path) == []
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
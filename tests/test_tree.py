@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+
+import pytest
+
+from rppc.tree import FileTree
+from rppc.utils import file_writer, folder_creator
+
+
+def test_render_through_utils_and_flush(tmp_path):
+    tree = FileTree()
+    package = folder_creator(tree, 'pkg')
+    file_writer(package, '__init__.py', 'x = 1\n')
+    folder_creator(tree, 'empty')
+    file_writer(tree, 'run.sh', '#!/bin/sh\n')
+    tree.add_file('run.sh', b'#!/bin/sh\n', 0o755)
+
+    assert list(tree) == ['pkg/__init__.py', 'run.sh']
+    assert tree.dirs == ['empty', 'pkg']
+    assert tree.size == 16
+
+    tree.flush(str(tmp_path))
+    assert (tmp_path / 'pkg' / '__init__.py').read_text() == 'x = 1\n'
+    assert (tmp_path / 'empty').is_dir()
+    assert stat.S_IMODE(os.stat(tmp_path / 'run.sh').st_mode) & 0o100
+
+
+def test_diff(tmp_path):
+    tree = FileTree()
+    tree.add_file('a', 'same')
+    tree.add_file('b', 'new')
+    tree.add_file('c/d', 'other')
+    (tmp_path / 'a').write_text('same')
+    (tmp_path / 'b').write_text('old')
+
+    assert tree.diff(str(tmp_path)) == {'added': ['c/d'], 'changed': ['b'], 'unchanged': ['a']}
+
+
+def test_paths_stay_inside(tmp_path):
+    tree = FileTree()
+    with pytest.raises(ValueError):
+        tree.add_file('../escape', '')
+    with pytest.raises(TypeError):
+        os.fspath(tree)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from rppc import utils
+
+REPOS = ['jsuser/exists'] + [f'jsuser/repo{i}' for i in range(150)] + ['jsuser/limited']
+
+
+@pytest.fixture
+def github_api(stub_server, monkeypatch):
+    hits = []
+
+    def respond(request, body):
+        url = urlparse(request.path)
+        hits.append(url.path)
+        if url.path == '/repos/jsuser/exists':
+            return 200, {'full_name': 'jsuser/exists'}, {}
+        if url.path == '/repos/jsuser/moved':
+            return 301, {'message': 'Moved Permanently'}, {'Location': '/repositories/1'}
+        if url.path == '/repos/jsuser/limited':
+            return 403, {'message': 'API rate limit exceeded'}, {}
+        if url.path == '/users/jsuser':
+            return 200, {'public_repos': len(REPOS)}, {}
+        if url.path == '/users/jsuser/repos':
+            page = int(parse_qs(url.query)['page'][0])
+            return 200, [{'full_name': name} for name in REPOS[(page - 1) * 100:page * 100]], {}
+        return 404, {'message': 'Not Found'}, {}
+
+    monkeypatch.setattr(utils, 'GITHUB_API_URL', stub_server(respond))
+    yield hits
+
+
+def test_check_package_is_a_single_request(github_api):
+    with pytest.warns(UserWarning):
+        assert utils.check_package('exists', 'jsuser')
+    assert utils.check_package('missing', 'jsuser') is False
+    assert github_api == ['/repos/jsuser/exists', '/repos/jsuser/missing']
+
+
+def test_renamed_repository_name_is_free(github_api):
+    with pytest.warns(UserWarning, match='renamed'):
+        assert utils.check_package('moved', 'jsuser') is False
+
+
+def test_falls_back_to_paginating(github_api):
+    with pytest.warns(UserWarning):
+        assert utils.check_package('limited', 'jsuser')
+    assert github_api == ['/repos/jsuser/limited', '/users/jsuser',
+                          '/users/jsuser/repos', '/users/jsuser/repos']
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import rppc
+from rppc import _version_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(rppc.__file__)))
+
+
+def git(*args, cwd):
+    subprocess.run(['git', *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def clone(tmp_path, monkeypatch):
+    if not os.path.isdir(os.path.join(ROOT, '.git')):
+        pytest.skip('Not a git checkout')
+    path = tmp_path / 'rppc'
+    git('clone', '--quiet', ROOT, str(path), cwd=str(tmp_path))
+    for role in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{role}_NAME', 't')
+        monkeypatch.setenv(f'GIT_{role}_EMAIL', 't@t')
+    # With the code under test, which may not be committed yet
+    shutil.copytree(os.path.join(ROOT, 'rppc'), str(path / 'rppc'), dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns('__pycache__', '_frozen_version.py'))
+    git('commit', '--quiet', '--allow-empty', '-am', 'Code under test', cwd=str(path))
+    # Refresh the stat data of the index, as the first git describe would
+    git('status', cwd=str(path))
+    monkeypatch.setenv('RPPC_CACHE_DIR', str(tmp_path / 'cache'))
+    return path
+
+
+def version(clone):
+    return subprocess.run([sys.executable, '-c', 'import rppc; print(rppc.__version__)'], cwd=str(clone),
+                          check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout.strip()
+
+
+def test_cached_version_follows_tags_and_edits(clone):
+    assert '+' in version(clone) and not version(clone).endswith('.dirty')
+    git('tag', 'v5.0', cwd=str(clone))
+    assert version(clone) == '5.0'
+    with open(clone / 'README.md', 'a') as f:
+        f.write('\nEdited\n')
+    assert version(clone).endswith('.dirty')
+    git('checkout', '--', 'README.md', cwd=str(clone))
+    assert version(clone) == '5.0'
+
+
+def test_worktree_key(clone):
+    git_dir = str(clone / '.git')
+    assert _version_cache.worktree_key(git_dir, str(clone)) == []
+    os.remove(clone / 'setup.py')
+    assert _version_cache.worktree_key(git_dir, str(clone)) == [['setup.py', None]]
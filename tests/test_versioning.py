@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import rppc
+from rppc import versioning
+from rppc.tree import FileTree
+
+
+def test_use_versioneer_in_tree():
+    tree = FileTree()
+    rppc.init_package_code_dir(tree, 'pkg', author_name='First Last')
+    rppc.create_manifest(tree)
+    rppc.use_versioneer(tree, 'pkg')
+
+    assert tree.read('versioneer.py') == versioning.versioneer_source()
+    assert tree.read('.gitattributes') == b'pkg/_version.py export-subst\n'
+    assert tree.read('pkg/__init__.py').decode().splitlines() == [
+        "__author__ = 'First Last'",
+        'from . import _version',
+        "__version__ = _version.get_versions()['version']",
+    ]
+    assert tree.read('MANIFEST.in').endswith(b'include versioneer.py\ninclude pkg/_version.py\n')
+
+    version_py = tree.read('pkg/_version.py').decode()
+    compile(version_py, '_version.py', 'exec')
+    assert 'cfg.tag_prefix = "v"' in version_py
+    assert 'cfg.versionfile_source = "pkg/_version.py"' in version_py
+
+
+def test_bundled_version():
+    assert versioning.bundled_version() == '0.29'